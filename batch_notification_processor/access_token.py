@@ -1,46 +1,90 @@
 import datetime
+import http_session
 import jwt
 import logging
 import os
-import requests
+import retry
+import threading
 import time
 import uuid
 
 EXPIRES_IN_MINUTES = 5
+REFRESH_MARGIN_SECONDS = 60
+
+_TOKEN_LOCK = threading.Lock()
+_TOKEN_CACHE: dict = {}
 
 # pylint: disable=unsupported-binary-operation
 
 
 def get_token() -> str:
+    """
+    Return a cached access token, requesting a new one when it is missing or close to expiry.
+
+    The cache lives in process memory so warm invocations reuse the token. Concurrent callers
+    share a single in-flight refresh by waiting on the cache lock.
+    """
     if not os.getenv("OAUTH2_API_KEY"):
         return "awaiting-token"
 
-    auth_jwt: str = generate_auth_jwt()
+    with _TOKEN_LOCK:
+        if _TOKEN_CACHE.get("refresh_at", 0) <= time.monotonic():
+            access_token, expires_in = request_token()
+            _TOKEN_CACHE.clear()
+
+            if access_token:
+                _TOKEN_CACHE["access_token"] = access_token
+                _TOKEN_CACHE["refresh_at"] = time.monotonic() + max(expires_in - REFRESH_MARGIN_SECONDS, 0)
+
+            return access_token
+
+        return _TOKEN_CACHE["access_token"]
+
+
+def invalidate_token(access_token: str | None = None):
+    """
+    Drop the cached token so the next get_token() call requests a new one.
+
+    When access_token is given the cache is only cleared if it still holds that token,
+    so callers reacting to the same 401 trigger a single refresh between them.
+    """
+    with _TOKEN_LOCK:
+        if access_token is None or _TOKEN_CACHE.get("access_token") == access_token:
+            _TOKEN_CACHE.clear()
+
+
+def request_token() -> tuple[str, int]:
     headers: dict = {"Content-Type": "application/x-www-form-urlencoded"}
 
-    body = {
-        "grant_type": "client_credentials",
-        "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
-        "client_assertion": auth_jwt,
-    }
+    def post():
+        body = {
+            "grant_type": "client_credentials",
+            "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
+            "client_assertion": generate_auth_jwt(),
+        }
+
+        return http_session.session().post(
+            str(os.getenv("OAUTH2_TOKEN_URL")),
+            data=body,
+            headers=headers,
+            timeout=10,
+        )
 
-    response = requests.post(
-        str(os.getenv("OAUTH2_TOKEN_URL")),
-        data=body,
-        headers=headers,
-        timeout=10,
-    )
+    # Each attempt signs a fresh client assertion, as the token provider rejects a reused jti.
+    response = retry.send(post, "OAuth2 token request")
     logging.info("Response from OAuth2 token provider: %s", response.status_code)
     response_json = response.json()
 
     if response.status_code == 200:
         access_token = response_json["access_token"]
+        expires_in = int(response_json.get("expires_in", EXPIRES_IN_MINUTES * 60))
     else:
         access_token = ""
+        expires_in = 0
         logging.error("Failed to get access token")
         logging.error(response_json)
 
-    return access_token
+    return access_token, expires_in
 
 
 def generate_auth_jwt() -> str:
@@ -1,6 +1,7 @@
+import itertools
 import logging
-import hashlib
-import time
+import secrets
+import threading
 import uuid
 import oracledb
 import oracle_database
@@ -12,20 +13,23 @@ class RecipientsNotFoundError(Exception):
 
 def next_batch() -> tuple:
     """
-    Fetch the next batch ID and routing plan ID.
+    Claim the next batch, assigning its message IDs and fetching its first page of recipients in one database round trip.
 
     Returns:
-        tuple: A tuple containing the batch ID and routing plan ID.
+        tuple: A tuple containing the batch ID, routing plan ID and recipients, streamed a page at a time.
     """
     try:
         batch_id = generate_batch_id()
-        routing_plan_id = get_routing_plan_id(batch_id)
-        recipients = None
+        routing_plan_id, recipients = oracle_database.claim_next_batch(batch_id)
 
-        if routing_plan_id:
-            recipients = get_recipients(batch_id)
+        if not routing_plan_id:
+            return batch_id, None, None
 
-        return batch_id, routing_plan_id, recipients
+        if not recipients:
+            logging.error("No recipients for batch ID: %s", batch_id)
+            return batch_id, routing_plan_id, recipients
+
+        return batch_id, routing_plan_id, itertools.chain.from_iterable(stream_pages(batch_id, recipients))
     except oracledb.Error as e:
         logging.error("Error fetching next batch: %s", e)
         return None, None, None
@@ -36,34 +40,114 @@ def get_routing_plan_id(batch_id):
 
 
 def get_recipients(batch_id):
-    recipients = []
+    """
+    Stream the batch's unsent recipients, giving a message ID to each one that does not have one yet.
 
+    A batch redelivered after a partial send therefore resends only its unsent recipients, with the
+    message IDs they were first sent with, so NHS Notify can recognise the duplicate messages.
+    Recipients whose message ID could not be saved are released back to new rather than sent.
+    A failure to fetch the first page is raised, as an empty list means there is nothing left to send.
+    """
     try:
-        recipients = oracle_database.get_recipients(batch_id)
-        if not recipients:
+        page = oracle_database.get_recipients_page(batch_id)
+        if not page:
             logging.error("No recipients for batch ID: %s", batch_id)
+            return page
     except oracledb.Error as e:
         logging.error("Error fetching recipients: %s", e)
+        raise
+
+    return itertools.chain.from_iterable(assign_message_ids(batch_id, page) for page in stream_pages(batch_id, page))
+
+
+def stream_pages(batch_id: str, page: list):
+    """
+    Yield a batch's pages of unsent recipients, starting from a page already fetched.
+
+    The next page is only fetched once the one before has been consumed, so a batch
+    is never held in memory whole.
+    """
+    while page:
+        yield page
+
+        if len(page) < oracle_database.FETCH_PAGE_SIZE:
+            return
+
+        page = oracle_database.get_recipients_page(batch_id, page[-1].nhs_number)
+
+
+def assign_message_ids(batch_id: str, recipients: list) -> list:
+    unassigned = [r for r in recipients if not r.message_id]
+
+    if not unassigned:
+        return recipients
+
+    for recipient, message_reference in zip(unassigned, generate_message_references(len(unassigned))):
+        recipient.message_id = message_reference
 
-    for recipient in recipients:
-        recipient.message_id = generate_message_reference()
-        oracle_database.update_message_id(recipient)
+    failed = [unassigned[error.offset] for error in oracle_database.update_message_ids(batch_id, unassigned)]
 
-    return recipients
+    if not failed:
+        return recipients
 
+    oracle_database.release_recipients(batch_id, failed)
+    failed_ids = {id(r) for r in failed}
 
-def mark_batch_as_sent(batch_id):
-    oracle_database.mark_batch_as_sent(batch_id)
+    return [r for r in recipients if id(r) not in failed_ids]
+
+
+def mark_chunk_as_sent(chunk_reference: str, chunk: list):
+    oracle_database.mark_recipients_as_sent(chunk_reference, chunk)
+
+
+def release_batch(batch_id):
+    oracle_database.release_batch(batch_id)
 
 
 def generate_batch_id() -> str:
-    return generate_reference("bcss_notify_batch_id")
+    return generate_reference()
+
+
+def generate_message_references(count: int) -> list[str]:
+    return generate_references(count)
+
+
+def generate_chunk_reference(batch_id: str, message_id: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{batch_id}:{message_id}"))
+
+
+def generate_reference() -> str:
+    return generate_references(1)[0]
+
+
+def generate_references(count: int) -> list[str]:
+    """
+    Generate count unique version 4 UUID strings.
+
+    The first 64 bits are random and fixed for the life of the process, the last 62
+    bits are a counter. References never repeat within a process, and processes are
+    told apart by the random half. A block of counter values is reserved under a lock
+    so concurrent callers never overlap.
+    """
+    with _REFERENCE_LOCK:
+        start = _REFERENCE_STATE["next"]
+        _REFERENCE_STATE["next"] = start + count
+
+    prefix = _REFERENCE_STATE["prefix"]
+
+    return [
+        f"{prefix}{(RFC_4122_VARIANT | n) >> 48:04x}-{n & 0xFFFFFFFFFFFF:012x}"
+        for n in range(start, start + count)
+    ]
+
 
+def new_reference_prefix() -> str:
+    high_bits = (secrets.randbits(64) & ~(0xF << 12)) | (0x4 << 12)
+    hex_digits = f"{high_bits:016x}"
+    return f"{hex_digits[:8]}-{hex_digits[8:12]}-{hex_digits[12:]}-"
 
-def generate_message_reference() -> str:
-    return generate_reference("bcss_notify_message_reference")
 
+RFC_4122_VARIANT = 0b10 << 62
 
-def generate_reference(prefix = "") -> str:
-    str_val = f"{prefix}:{time.time()}"
-    return str(uuid.UUID(hashlib.md5(str_val.encode()).hexdigest()))
+_REFERENCE_LOCK = threading.Lock()
+_REFERENCE_STATE = {"prefix": new_reference_prefix(), "next": 0}
@@ -0,0 +1,79 @@
+"""Queue of claimed batches fanned out from a coordinator invocation to SQS-triggered workers."""
+
+import json
+from lazy import Lazy
+import os
+import boto3
+
+MAX_RECEIVE_COUNT = 5
+
+_CLIENT = Lazy(lambda: boto3.client("sqs", region_name=os.getenv("REGION_NAME")))
+
+
+def enabled() -> bool:
+    return bool(os.getenv("BATCH_QUEUE_URL"))
+
+
+def enqueue(batch_id: str, routing_plan_id: str):
+    client().send_message(
+        QueueUrl=os.environ["BATCH_QUEUE_URL"],
+        MessageBody=json.dumps({"batch_id": batch_id, "routing_plan_id": routing_plan_id}),
+    )
+
+
+def queued_batches(records: list) -> list:
+    """
+    Return the (message ID, batch ID, routing plan ID, receive count) named by each record of an SQS event.
+
+    Records whose body cannot be read are returned with a batch ID of None so they can be
+    reported back to SQS as failures.
+    """
+    batches = []
+
+    for record in records:
+        receive_count = int(record.get("attributes", {}).get("ApproximateReceiveCount", 1))
+
+        try:
+            body = json.loads(record["body"])
+            batches.append((record["messageId"], body["batch_id"], body["routing_plan_id"], receive_count))
+        except (KeyError, TypeError, ValueError):
+            batches.append((record.get("messageId"), None, None, receive_count))
+
+    return batches
+
+
+def max_receive_count() -> int:
+    """Return the receives after which SQS moves a record to the dead-letter queue, 0 when there is none."""
+    return int(os.getenv("BATCH_QUEUE_MAX_RECEIVE_COUNT", str(MAX_RECEIVE_COUNT)))
+
+
+def client():
+    return _CLIENT.get()
+
+
+class LocalBatchQueue:
+    """In-memory stand-in for the SQS queue, delivering enqueued batches as SQS event records."""
+
+    def __init__(self):
+        self.messages = []
+        self.sent = 0
+
+    def send_message(self, QueueUrl: str, MessageBody: str):  # pylint: disable=invalid-name
+        self.sent += 1
+        message_id = str(self.sent)
+        self.messages.append(
+            {
+                "messageId": message_id,
+                "body": MessageBody,
+                "attributes": {"ApproximateReceiveCount": "1"},
+                "eventSourceARN": QueueUrl,
+            }
+        )
+
+        return {"MessageId": message_id}
+
+    def event(self, batch_size: int = 10) -> dict:
+        """Remove up to batch_size messages from the queue and return them as an SQS event."""
+        records, self.messages = self.messages[:batch_size], self.messages[batch_size:]
+
+        return {"Records": records}
@@ -1,12 +1,31 @@
 import access_token
+import circuit_breaker
 import hashlib
 import hmac
-import json
+import http_session
+import json_codec
 import os
+import rate_limiter
+import retry
+from typing import Iterable, Iterator
 import uuid
 from recipient import Recipient
 import requests
 
+MAX_MESSAGES_PER_REQUEST = 45000
+MAX_REQUEST_BYTES = 5_000_000
+REQUEST_ENVELOPE_BYTES = 512
+
+
+class MessageChunk(list):
+    """Recipients that fit in one message batch request, with the message encoded for each one."""
+
+    __slots__ = ("messages",)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+
 
 class CommunicationManagement:
     def __init__(self) -> None:
@@ -21,55 +40,106 @@ class CommunicationManagement:
         routing_config_id: str,
         recipients: list[Recipient],
     ) -> requests.Response:
-        request_body: dict = self.generate_batch_message_request_body(
-            routing_config_id, batch_id, recipients
-        )
+        request_body: bytes = self.encode_batch_message_request_body(routing_config_id, batch_id, recipients)
 
         hmac_signature = self.generate_hmac_signature(request_body)
+        token = access_token.get_token()
         headers = {
             "content-type": "application/vnd.api+json",
             "accept": "application/vnd.api+json",
             "x-correlation-id": str(uuid.uuid4()),
             "x-api-key": self.api_key,
             "x-hmac-sha256-signature": hmac_signature,
-            "authorization": f"Bearer {access_token.get_token()}"
+            "authorization": f"Bearer {token}"
         }
 
         url = f"{self.base_url}/message/batch"
 
-        response = requests.post(
-            url,
-            headers=headers,
-            json=request_body,
-            timeout=10
-        )
+        def post() -> requests.Response:
+            return http_session.session().post(
+                url,
+                headers=headers,
+                data=request_body,
+                timeout=10
+            )
+
+        def send() -> requests.Response:
+            return circuit_breaker.notify(
+                lambda: retry.send(rate_limiter.limited("message_batch", post), f"Message batch {batch_id}")
+            )
+
+        response = send()
+
+        if response.status_code == 401:
+            access_token.invalidate_token(token)
+            headers["authorization"] = f"Bearer {access_token.get_token()}"
+            response = send()
 
         return response
 
-    def generate_batch_message_request_body(
+    def chunk_recipients(self, recipients: Iterable[Recipient]) -> Iterator[MessageChunk]:
+        """
+        Split recipients into chunks that each fit in a single message batch request.
+
+        A chunk is closed once it reaches MAX_MESSAGES_PER_REQUEST messages or the next
+        message would take the serialized request body over MAX_REQUEST_BYTES. Each message
+        is encoded once here and kept with its chunk for the request body. Chunks are yielded
+        as they fill, so a streamed batch is sent without ever being held whole.
+        """
+        max_messages = int(os.getenv("MAX_MESSAGES_PER_REQUEST", str(MAX_MESSAGES_PER_REQUEST)))
+        max_bytes = int(os.getenv("MAX_REQUEST_BYTES", str(MAX_REQUEST_BYTES)))
+        chunk = MessageChunk()
+        chunk_bytes = REQUEST_ENVELOPE_BYTES
+
+        for recipient in recipients:
+            message = self.encode_message(recipient)
+            message_bytes = len(message.encode("utf-8")) + 1
+
+            if chunk and (len(chunk) >= max_messages or chunk_bytes + message_bytes > max_bytes):
+                yield chunk
+                chunk = MessageChunk()
+                chunk_bytes = REQUEST_ENVELOPE_BYTES
+
+            chunk.append(recipient)
+            chunk.messages.append(message)
+            chunk_bytes += message_bytes
+
+        if chunk:
+            yield chunk
+
+    def encode_batch_message_request_body(
         self, routing_config_id: str, message_batch_reference: str, recipients: list[Recipient]
-    ) -> dict:
-        return {
-            "data": {
-                "type": "MessageBatch",
-                "attributes": {
-                    "routingPlanId": routing_config_id,
-                    "messageBatchReference": message_batch_reference,
-                    "messages": [self.generate_message(r) for r in recipients],
-                },
-            }
-        }
+    ) -> bytes:
+        """
+        Encode a message batch request body straight from the recipients, as compact UTF-8 JSON.
 
-    def generate_message(self, recipient) -> dict:
-        return {
-            "messageReference": recipient.message_id, # pylint: disable=no-member
-            "recipient": {"nhsNumber": recipient.nhs_number}, # pylint: disable=no-member
-            "personalisation": {},
-        }
+        The body is encoded once, so the bytes covered by the HMAC signature are exactly the
+        bytes posted to NHS Notify, and no dict is built for each message along the way.
+        A MessageChunk's messages are joined as they are rather than encoded again.
+        """
+        if isinstance(recipients, MessageChunk):
+            messages = ",".join(recipients.messages)
+        else:
+            messages = ",".join(self.encode_message(r) for r in recipients)
+
+        return (
+            '{"data":{"type":"MessageBatch","attributes":{'
+            f'"routingPlanId":{json_codec.encode_string(routing_config_id)},'
+            f'"messageBatchReference":{json_codec.encode_string(message_batch_reference)},'
+            f'"messages":[{messages}]'
+            '}}}'
+        ).encode("utf-8")
+
+    def encode_message(self, recipient) -> str:
+        return (
+            f'{{"messageReference":{json_codec.encode_string(recipient.message_id)},'  # pylint: disable=no-member
+            f'"recipient":{{"nhsNumber":{json_codec.encode_string(recipient.nhs_number)}}},'  # pylint: disable=no-member
+            '"personalisation":{}}'
+        )
 
-    def generate_hmac_signature(self, request_body: dict) -> str:
+    def generate_hmac_signature(self, request_body: bytes) -> str:
         return hmac.new(
             bytes(self.secret, 'ASCII'),
-            msg=bytes(json.dumps(request_body), 'ASCII'),
+            msg=request_body,
             digestmod=hashlib.sha256
         ).hexdigest()
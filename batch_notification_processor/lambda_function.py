@@ -1,45 +1,345 @@
 """Lambda function to process and send batch notifications via NHS Notify service."""
 
 import batch_processor
+import batch_queue
+import circuit_breaker
 import environment
+import http_session
 import logging as pylogging
 import os
 from communication_management import CommunicationManagement
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import queue
+import rate_limiter
+import retry
+import threading
+import time
+from typing import Callable
+from time_budget import TimeBudget
 
 logging = pylogging.getLogger()
 logging.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
+environment.prefetch()
+http_session.session()
 
-def lambda_handler(_event: dict, _context: object) -> dict:
+MAX_CONCURRENT_BATCHES = 1
+PREFETCH_BATCHES = 1
+BATCH_ESTIMATE_SECONDS = 15
+CLAIM_ESTIMATE_SECONDS = 1
+
+
+def lambda_handler(event: dict, context: object) -> dict:
     """
     AWS Lambda handler to process and send batch notifications.
+
+    When triggered by SQS the handler sends exactly the batches named in the event records.
+    Otherwise, when BATCH_QUEUE_URL is set, it acts as a coordinator: it claims batches and
+    enqueues them for SQS-triggered invocations to send, so throughput scales with Lambda
+    concurrency. Without a queue it claims and sends every batch itself.
     """
     logging.info("Lambda function has started.")
 
     environment.seed()
+    retry.reset_budget()
+    rate_limiter.reset_metrics()
 
-    batch_id, routing_plan_id, recipients = batch_processor.next_batch()
-    batches = [batch_id]
+    if records := (event or {}).get("Records"):
+        return process_queued_batches(records, context)
 
-    while routing_plan_id and recipients:
-        logging.info("Batch ID: %s, Routing plan ID: %s, Recipients: %s", batch_id, routing_plan_id, recipients)
+    if batch_queue.enabled():
+        return fan_out_batches(context)
 
-        response = CommunicationManagement().send_batch_message(
-            batch_id, routing_plan_id, recipients
-        )
+    budget = TimeBudget(context, batch_estimate_seconds())
+    batches, _ = process_batches(batch_processor.next_batch, budget)
 
-        if response.status_code == 201:
-            batch_processor.mark_batch_as_sent(batch_id)
-            batches.append(batch_id)
-            logging.info("Batch %s sent successfully to %s recipients.", batch_id, len(recipients))
-        else:
-            logging.error("Batch %s failed to send. Status code: %s. Response: %s", batch_id, response.status_code, response.text)
+    logging.info("Lambda function has completed processing. Batches sent: %s", batches)
+
+    if budget.exhausted:
+        logging.warning("Stopped claiming batches ahead of the Lambda deadline, remaining batches need another invocation.")
+
+    return {
+        "status": "complete",
+        "message": f"Processed batches: {batches}",
+        "continuation": budget.exhausted,
+        "circuit_breakers": circuit_breaker.states(),
+    }
+
+
+def process_queued_batches(records: list, context: object) -> dict:
+    """
+    Send the batches named in an SQS event.
+
+    A record is only acknowledged once every chunk of its batch has been sent. Otherwise it is
+    reported as a batch item failure, so SQS delivers it again once its visibility timeout
+    expires and the batch's unsent recipients, which stay under its batch ID until their chunk
+    is sent, are sent then. On the final receive before the dead-letter queue an unsent batch
+    is released back to new instead, so a later claim picks its recipients up. Records that
+    can never be sent, because their body cannot be read or their batch has no unsent
+    recipients left, are logged and acknowledged rather than redelivered.
+    """
+    budget = TimeBudget(context, batch_estimate_seconds())
+    queued = batch_queue.queued_batches(records)
+    named = iter([(batch_id, routing_plan_id) for _, batch_id, routing_plan_id, _ in queued if batch_id])
+    redelivered = frozenset(batch_id for _, batch_id, _, receive_count in queued if batch_id and receive_count > 1)
+    settled = set()
+
+    for message_id, batch_id, _, _ in queued:
+        if not batch_id:
+            logging.error("Unreadable batch queue record %s, acknowledging without sending.", message_id)
+
+    def next_queued_batch() -> tuple:
+        for batch_id, routing_plan_id in named:
+            recipients = batch_processor.get_recipients(batch_id)
+
+            if recipients:
+                return batch_id, routing_plan_id, recipients
+
+            logging.warning("Batch %s has no unsent recipients, acknowledging without sending.", batch_id)
+            settled.add(batch_id)
+
+        return None, None, None
 
-        batch_id, routing_plan_id, recipients = batch_processor.next_batch()
+    batches, complete = process_batches(next_queued_batch, budget, redelivered)
+    failures = []
+
+    for message_id, batch_id, routing_plan_id, receive_count in queued:
+        if not batch_id or batch_id in complete or batch_id in settled:
+            continue
+
+        if 0 < batch_queue.max_receive_count() <= receive_count:
+            logging.warning("Batch %s was not sent by its final receive, releasing it back to new.", batch_id)
+
+            if release_batch(batch_id, routing_plan_id):
+                continue
+
+        failures.append({"itemIdentifier": message_id})
 
     logging.info("Lambda function has completed processing. Batches sent: %s", batches)
 
+    if failures:
+        logging.warning("Batches not sent, returning to queue: %s", failures)
+
     return {
         "status": "complete",
         "message": f"Processed batches: {batches}",
+        "continuation": budget.exhausted,
+        "circuit_breakers": circuit_breaker.states(),
+        "batchItemFailures": failures,
     }
+
+
+def fan_out_batches(context: object) -> dict:
+    """
+    Claim batches and enqueue them for SQS-triggered invocations to send.
+
+    Only the claim happens here; message IDs are assigned and recipients fetched by the
+    invocation that sends the batch. A batch that is claimed but cannot be enqueued is
+    released back to new, so a later invocation claims it again.
+    """
+    budget = TimeBudget(context, CLAIM_ESTIMATE_SECONDS)
+    batches = []
+
+    try:
+        while budget.can_start():
+            claimed_at = time.monotonic()
+            batch_id = batch_processor.generate_batch_id()
+            routing_plan_id = batch_processor.get_routing_plan_id(batch_id)
+
+            if not routing_plan_id:
+                break
+
+            try:
+                batch_queue.enqueue(batch_id, routing_plan_id)
+            except Exception as e:
+                logging.error("Error enqueuing batch %s with routing plan %s: %s", batch_id, routing_plan_id, e)
+                release_batch(batch_id, routing_plan_id)
+                break
+
+            batches.append(batch_id)
+            budget.record(time.monotonic() - claimed_at)
+    except Exception as e:
+        logging.error("Error claiming batch: %s", e)
+
+    logging.info("Lambda function has completed fan-out. Batches enqueued: %s", batches)
+
+    return {
+        "status": "complete",
+        "message": f"Enqueued batches: {batches}",
+        "continuation": budget.exhausted,
+        "circuit_breakers": circuit_breaker.states(),
+    }
+
+
+def release_batch(batch_id: str, routing_plan_id: str) -> bool:
+    """Return a claimed batch's unsent recipients to new, logging its IDs if even that fails."""
+    try:
+        batch_processor.release_batch(batch_id)
+        logging.info("Released batch %s back to new.", batch_id)
+        return True
+    except Exception as e:
+        logging.error(
+            "Batch %s with routing plan %s is claimed but neither sent nor released: %s", batch_id, routing_plan_id, e
+        )
+        return False
+
+
+def process_batches(next_batch: Callable[[], tuple], budget: TimeBudget, redelivered: frozenset = frozenset()) -> tuple:
+    """
+    Claim batches with next_batch and send them.
+
+    Batches are claimed on a producer thread and handed to the sender through a queue holding
+    at most PREFETCH_BATCHES claimed batches, so the next batch is claimed while the current one
+    is being sent. Up to MAX_CONCURRENT_BATCHES claimed batches are sent to NHS Notify concurrently,
+    each marked as sent by the worker that sent it once its own request has been accepted.
+    Claiming stops when no batches remain, the NHS Notify circuit breaker is open or the time
+    budget says the next batch would not finish before the Lambda deadline. A batch claimed
+    before the breaker opened is released back to new by send_batch.
+
+    Returns:
+        tuple: The references of the chunks sent, and the IDs of the batches with nothing left to send.
+    """
+    concurrency = max_concurrent_batches()
+    communication_management = CommunicationManagement()
+    batches = []
+    complete = set()
+    in_flight = {}
+    claimed = queue.Queue(maxsize=prefetch_batches())
+    producer = threading.Thread(target=claim_batches, args=(claimed, budget, next_batch), daemon=True)
+    producer.start()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while (batch := claimed.get()) is not None:
+            claimed_at, batch_id, routing_plan_id, recipients = batch
+            logging.info("Batch ID: %s, Routing plan ID: %s", batch_id, routing_plan_id)
+
+            future = executor.submit(
+                timed_send_batch,
+                budget,
+                claimed_at,
+                communication_management,
+                batch_id,
+                routing_plan_id,
+                recipients,
+                batch_id in redelivered,
+            )
+            in_flight[future] = batch_id
+
+            if len(in_flight) >= concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect_sent_batches({future: in_flight.pop(future) for future in done}, batches, complete)
+
+        collect_sent_batches(in_flight, batches, complete)
+
+    producer.join()
+    logging.info("Rate limiter metrics: %s", rate_limiter.metrics())
+
+    return batches, complete
+
+
+def claim_batches(claimed: queue.Queue, budget: TimeBudget, next_batch: Callable[[], tuple]):
+    """
+    Claim batches onto the queue until none remain or the budget runs out, then enqueue None.
+
+    Claiming also stops while the NHS Notify circuit breaker is open, so batches are not
+    claimed only to fail to send.
+    """
+    notify = circuit_breaker.circuit("notify")
+
+    try:
+        while budget.can_start():
+            if not notify.available():
+                logging.warning("Stopped claiming batches while the NHS Notify circuit breaker is open.")
+                break
+
+            claimed_at = time.monotonic()
+            batch_id, routing_plan_id, recipients = next_batch()
+
+            if not (routing_plan_id and recipients):
+                break
+
+            claimed.put((claimed_at, batch_id, routing_plan_id, recipients))
+    except Exception as e:
+        logging.error("Error claiming batch: %s", e)
+    finally:
+        claimed.put(None)
+
+
+def timed_send_batch(budget: TimeBudget, claimed_at: float, *args) -> tuple:
+    """Send a batch and record the time since it was claimed against the budget."""
+    try:
+        return send_batch(*args)
+    finally:
+        budget.record(time.monotonic() - claimed_at)
+
+
+def send_batch(
+    communication_management: CommunicationManagement, batch_id: str, routing_plan_id: str, recipients, redelivered: bool = False
+) -> tuple:
+    """
+    Send a claimed batch in chunks that fit the NHS Notify request limits, each as soon as it fills.
+
+    The recipients are streamed a page at a time, so only the chunk being sent is held in memory.
+    The first chunk is sent as the batch ID; every other chunk, and every chunk of a redelivered
+    batch whose batch ID may already have been sent, gets a reference derived from the batch ID
+    and its first message ID. Once NHS Notify accepts a chunk its recipients are moved to its
+    reference and marked as sent, so a failed chunk leaves only its own recipients unsent.
+    If the NHS Notify circuit breaker refuses a chunk, the request was never sent, so the
+    batch's unsent recipients are released back to new rather than left claimed.
+
+    Returns:
+        tuple: The references of the chunks sent, and whether nothing is left to send under the batch ID.
+    """
+    sent_references = []
+    all_sent = True
+
+    for index, chunk in enumerate(communication_management.chunk_recipients(recipients)):
+        if index or redelivered:
+            chunk_reference = batch_processor.generate_chunk_reference(batch_id, chunk[0].message_id)
+        else:
+            chunk_reference = batch_id
+
+        try:
+            response = communication_management.send_batch_message(chunk_reference, routing_plan_id, chunk)
+        except circuit_breaker.CircuitOpenError as e:
+            logging.warning("Batch %s was not sent: %s", chunk_reference, e)
+            return sent_references, release_batch(batch_id, routing_plan_id)
+
+        if response.status_code == 201:
+            batch_processor.mark_chunk_as_sent(chunk_reference, chunk)
+            sent_references.append(chunk_reference)
+            logging.info("Batch %s sent successfully to %s recipients.", chunk_reference, len(chunk))
+        else:
+            all_sent = False
+            logging.error(
+                "Batch %s failed to send. Status code: %s. Response: %s", chunk_reference, response.status_code, response.text
+            )
+
+    return sent_references, all_sent
+
+
+def collect_sent_batches(futures: dict, batches: list, complete: set):
+    """Add the chunk references each finished send returned to batches, and its batch ID to complete if nothing is left to send."""
+    for future, batch_id in futures.items():
+        try:
+            sent_references, all_sent = future.result()
+        except Exception as e:
+            logging.error("Error sending batch: %s", e)
+            continue
+
+        batches.extend(sent_references)
+
+        if all_sent:
+            complete.add(batch_id)
+
+
+def max_concurrent_batches() -> int:
+    return max(1, int(os.getenv("MAX_CONCURRENT_BATCHES", str(MAX_CONCURRENT_BATCHES))))
+
+
+def prefetch_batches() -> int:
+    return max(1, int(os.getenv("PREFETCH_BATCHES", str(PREFETCH_BATCHES))))
+
+
+def batch_estimate_seconds() -> float:
+    return float(os.getenv("BATCH_ESTIMATE_SECONDS", str(BATCH_ESTIMATE_SECONDS)))
@@ -1,9 +1,18 @@
 import logging
+from typing import Optional
 import oracledb
 import database
 
 from recipient import Recipient
 
+FETCH_PAGE_SIZE = 1000
+NEW_STATUS = "new"
+REQUESTED_STATUS = "requested"
+SENDING_STATUS = "sending"
+
+# The recipient fields read when building a Notify message. Add personalisation columns here.
+RECIPIENT_COLUMNS = ("nhs_number", "message_id")
+
 
 def get_routing_plan_id(batch_id: str):
     with database.cursor() as cursor:
@@ -16,54 +25,218 @@ def get_routing_plan_id(batch_id: str):
             raise
 
 
-def get_recipients(batch_id: str) -> list[Recipient]:
-    recipient_data = []
+def claim_next_batch(batch_id: str, columns: tuple = RECIPIENT_COLUMNS, page_size: int = FETCH_PAGE_SIZE) -> tuple:
+    """
+    Claim the next batch, assign its message IDs and fetch its first page of recipients in one round trip.
 
+    A single PL/SQL block calls PKG_NOTIFY_WRAP.f_get_next_batch, gives every claimed
+    recipient a UUID message ID, commits and opens a ref cursor over the first page_size
+    recipients. The ref cursor prefetches the whole page, so it comes back with the call
+    itself; get_recipients_page fetches the pages after it.
+
+    Returns:
+        tuple: The routing plan ID (None when there is nothing to claim) and the first page of recipients.
+    """
     with database.cursor() as cursor:
+        recipients_cursor = cursor.connection.cursor()
         try:
+            routing_plan_id = cursor.var(oracledb.STRING)
+            recipients_cursor.arraysize = page_size
+            recipients_cursor.prefetchrows = page_size + 1
+
             cursor.execute(
-                "SELECT * FROM v_notify_message_queue WHERE batch_id = :batch_id",
-                {"batch_id": batch_id},
+                claim_next_batch_block(columns),
+                {
+                    "batch_id": batch_id,
+                    "message_status": REQUESTED_STATUS,
+                    "page_size": page_size,
+                    "routing_plan_id": routing_plan_id,
+                    "recipients": recipients_cursor,
+                },
+            )
+
+            if not routing_plan_id.getvalue():
+                return None, []
+
+            recipients_cursor.rowfactory = Recipient.row_factory(
+                [column[0].lower() for column in recipients_cursor.description]
             )
-            recipient_data = cursor.fetchall()
+
+            return routing_plan_id.getvalue(), recipients_cursor.fetchall()
+        except oracledb.Error as e:
+            logging.error("Error claiming next batch: %s", e)
+            cursor.connection.rollback()
+            raise
+        finally:
+            recipients_cursor.close()
+
+
+def claim_next_batch_block(columns: tuple = RECIPIENT_COLUMNS) -> str:
+    return f"""
+        DECLARE
+            v_routing_plan_id VARCHAR2(38);
+        BEGIN
+            v_routing_plan_id := pkg_notify_wrap.f_get_next_batch(:batch_id);
+            :routing_plan_id := v_routing_plan_id;
+
+            IF v_routing_plan_id IS NOT NULL THEN
+                UPDATE v_notify_message_queue
+                SET message_id = REGEXP_REPLACE(
+                    LOWER(RAWTOHEX(SYS_GUID())), '(.{{8}})(.{{4}})(.{{4}})(.{{4}})(.{{12}})', '\\1-\\2-\\3-\\4-\\5'
+                )
+                WHERE batch_id = :batch_id;
+
+                OPEN :recipients FOR {recipients_query(columns)};
+            END IF;
+
+            COMMIT;
+        END;
+    """
+
+
+def get_recipients_page(
+    batch_id: str, after_nhs_number: Optional[str] = None, page_size: int = FETCH_PAGE_SIZE, columns: tuple = RECIPIENT_COLUMNS
+) -> list[Recipient]:
+    """
+    Fetch up to page_size of a batch's unsent recipients, ordered by NHS number.
+
+    Pages are keyed on the last NHS number of the page before, so each page is a query of
+    its own and no cursor or connection is held between pages. Only the given columns are
+    selected and rows are mapped to Recipients by column name.
+    """
+    binds = {"batch_id": batch_id, "message_status": REQUESTED_STATUS, "page_size": page_size}
+
+    if after_nhs_number is not None:
+        binds["after_nhs_number"] = after_nhs_number
+
+    with database.cursor() as cursor:
+        try:
+            cursor.arraysize = page_size
+            cursor.prefetchrows = page_size + 1
+            cursor.execute(recipients_query(columns, after_nhs_number is not None), binds)
+            cursor.rowfactory = Recipient.row_factory([column[0].lower() for column in cursor.description])
+
+            return cursor.fetchall()
         except oracledb.Error as e:
             logging.error("Error executing query: %s", e)
+            raise
+
 
-    return [Recipient(rd) for rd in recipient_data]
+def recipients_query(columns: tuple = RECIPIENT_COLUMNS, after: bool = False) -> str:
+    unknown_columns = [column for column in columns if column not in Recipient.ATTR_NAMES]
+    if unknown_columns:
+        raise ValueError(f"Unknown recipient columns: {unknown_columns}")
 
+    if "nhs_number" not in columns:
+        raise ValueError("Recipient columns must include nhs_number, the key recipients are paged on")
 
-def mark_batch_as_sent(batch_id: str):
+    return (
+        f"SELECT {', '.join(columns)} FROM v_notify_message_queue "
+        "WHERE batch_id = :batch_id AND message_status = :message_status "
+        f"{'AND nhs_number > :after_nhs_number ' if after else ''}"
+        "ORDER BY nhs_number FETCH FIRST :page_size ROWS ONLY"
+    )
+
+
+def mark_recipients_as_sent(batch_id: str, recipients: list[Recipient]):
+    """
+    Move recipients to batch_id and mark them as sending, in one executemany and a single commit.
+
+    Only the given recipients are marked, so the rest of the batch they were claimed in is
+    left unsent until its own chunk has been sent.
+    """
     with database.cursor() as cursor:
         try:
-            result = cursor.callfunc(
-                "PKG_NOTIFY_WRAP.f_update_message_status",
-                oracledb.NUMBER,
-                [batch_id, None, "sending"]
+            cursor.executemany(
+                """
+                    DECLARE
+                        v_error_id NUMBER;
+                    BEGIN
+                        UPDATE v_notify_message_queue SET batch_id = :batch_id WHERE message_id = :message_id;
+                        v_error_id := pkg_notify_wrap.f_update_message_status(:batch_id, :message_id, :message_status);
+                    END;
+                """,
+                [{"batch_id": batch_id, "message_id": r.message_id, "message_status": SENDING_STATUS} for r in recipients],
             )
             cursor.connection.commit()
-            return result
         except oracledb.Error as e:
             logging.error("Error updating batch: %s", e)
             cursor.connection.rollback()
             raise
 
 
-def update_message_id(recipient: Recipient):
+def release_batch(batch_id: str):
+    """Return a claimed batch's unsent recipients to new, so the next f_get_next_batch call claims them again."""
     with database.cursor() as cursor:
         try:
             cursor.execute(
+                (
+                    "UPDATE v_notify_message_queue "
+                    "SET message_status = :new_status, batch_id = NULL "
+                    "WHERE batch_id = :batch_id AND message_status = :message_status"
+                ),
+                {"new_status": NEW_STATUS, "batch_id": batch_id, "message_status": REQUESTED_STATUS},
+            )
+            cursor.connection.commit()
+        except oracledb.Error as e:
+            logging.error("Error releasing batch %s: %s", batch_id, e)
+            cursor.connection.rollback()
+            raise
+
+
+def release_recipients(batch_id: str, recipients: list[Recipient]):
+    """Return some of a claimed batch's recipients to new, so the next f_get_next_batch call claims them again."""
+    with database.cursor() as cursor:
+        try:
+            cursor.executemany(
+                (
+                    "UPDATE v_notify_message_queue "
+                    "SET message_status = :new_status, batch_id = NULL "
+                    "WHERE nhs_number = :nhs_number AND batch_id = :batch_id AND message_status = :message_status"
+                ),
+                [
+                    {"new_status": NEW_STATUS, "nhs_number": r.nhs_number, "batch_id": batch_id, "message_status": REQUESTED_STATUS}
+                    for r in recipients
+                ],
+            )
+            cursor.connection.commit()
+        except oracledb.Error as e:
+            logging.error("Error releasing recipients of batch %s: %s", batch_id, e)
+            cursor.connection.rollback()
+            raise
+
+
+def update_message_ids(batch_id: str, recipients: list[Recipient]) -> list:
+    """
+    Assign message IDs to the batch's recipients in one executemany and a single commit.
+
+    Only the patient's row in this batch is updated, leaving their rows in earlier batches,
+    and the message IDs those were sent with, untouched.
+
+    Rows that fail are reported through batcherrors rather than rolling back the batch.
+
+    Returns:
+        list: The batch errors, each carrying the offset of the failed recipient.
+    """
+    with database.cursor() as cursor:
+        try:
+            cursor.executemany(
                 (
                     "UPDATE v_notify_message_queue "
                     "SET message_id = :message_id "
-                    "WHERE nhs_number = :nhs_number"
+                    "WHERE nhs_number = :nhs_number "
+                    "AND batch_id = :batch_id"
                 ),
-                {
-                    "message_id": recipient.message_id,
-                    "nhs_number": recipient.nhs_number
-                },
+                [{"message_id": r.message_id, "nhs_number": r.nhs_number, "batch_id": batch_id} for r in recipients],
+                batcherrors=True,
             )
+            batch_errors = cursor.getbatcherrors()
+            for error in batch_errors:
+                logging.error("Error updating recipient at offset %s: %s", error.offset, error.message)
+
             cursor.connection.commit()
+            return batch_errors
         except oracledb.Error as e:
-            logging.error("Error updating recipient: %s", e)
-            cursor.rollback()
+            logging.error("Error updating recipients: %s", e)
+            cursor.connection.rollback()
             raise
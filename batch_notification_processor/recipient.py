@@ -1,4 +1,4 @@
-class Recipient:
+class Recipient:  # pylint: disable=too-many-instance-attributes
     ATTR_NAMES = [
         "nhs_number",
         "message_id",
@@ -15,6 +15,34 @@ class Recipient:
         "gp_practice_name",
     ]
 
+    __slots__ = tuple(ATTR_NAMES)
+
     def __init__(self, attrs) -> None:
-        for idx, attr_name in enumerate(self.ATTR_NAMES):
-            setattr(self, attr_name, attrs[idx] if idx < len(attrs) else None)
+        if len(attrs) != len(self.ATTR_NAMES):
+            attrs = (tuple(attrs) + (None,) * len(self.ATTR_NAMES))[:len(self.ATTR_NAMES)]
+
+        (
+            self.nhs_number,
+            self.message_id,
+            self.batch_id,
+            self.routing_plan_id,
+            self.message_status,
+            self.variable_text_1,
+            self.address_line_1,
+            self.address_line_2,
+            self.address_line_3,
+            self.address_line_4,
+            self.address_line_5,
+            self.postcode,
+            self.gp_practice_name,
+        ) = attrs
+
+    @classmethod
+    def row_factory(cls, column_names: list[str]):
+        """Return a cursor rowfactory that builds Recipients from rows with the given column names, in any order."""
+        positions = [column_names.index(name) if name in column_names else None for name in cls.ATTR_NAMES]
+
+        def build(*row):
+            return cls(tuple(None if position is None else row[position] for position in positions))
+
+        return build
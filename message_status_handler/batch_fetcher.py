@@ -1,19 +1,43 @@
 import database
 import logging
 import oracledb
+import os
+
+POLLING_HORIZON_HOURS = 168
+SENDING_STATUS = "sending"
 
 
 def fetch_batch_ids():
+    """
+    Return the IDs of batches whose statuses can still change.
+
+    A batch is polled while it has messages that are still sending and were sent within
+    the polling horizon. f_update_message_status stamps read_datestamp when it marks a
+    message as sending, so the horizon runs from the send, for batch and chunk IDs alike.
+    Once every message has been read the batch is complete, and once its unread messages
+    pass the horizon it has expired; neither is returned. The query reads the queue table
+    directly so it can be answered from the (message_status, read_datestamp, batch_id)
+    index, scanning only live messages.
+    """
     batch_ids = []
 
     with database.cursor() as cursor:
         try:
             cursor.execute(
-                "SELECT DISTINCT batch_id FROM v_notify_message_queue WHERE message_status = :status",
-                {"status": "sending"}
+                """
+                    SELECT DISTINCT batch_id
+                    FROM notify_message_queue
+                    WHERE message_status = :status
+                    AND read_datestamp >= SYSTIMESTAMP - NUMTODSINTERVAL(:horizon_hours, 'HOUR')
+                """,
+                {"status": SENDING_STATUS, "horizon_hours": polling_horizon_hours()}
             )
             batch_ids = [row[0] for row in cursor.fetchall()]
         except oracledb.Error as e:
             logging.error("Error fetching batch IDs: %s", e)
 
     return batch_ids
+
+
+def polling_horizon_hours() -> int:
+    return int(os.getenv("STATUS_POLLING_HORIZON_HOURS", str(POLLING_HORIZON_HOURS)))
@@ -1,26 +1,88 @@
+import circuit_breaker
+import http_session
+import json_codec
 import os
-import requests
 import logging
+import rate_limiter
+import retry
+from typing import Iterator
+from urllib.parse import urljoin
 
 
-def get_read_messages(batch_reference: str) -> dict:
-    response = get_statuses(batch_reference)
+REQUEST_TIMEOUT = 10
 
-    if response.status_code == 201:
-        return response.json()
 
-    logging.error("Failed to fetch messages that have been read: %s ", response.text)
-    return {
-        "status": "error",
-        "message": f"Failed to fetch messages that have been read: {response.text}",
-        "data": [],
-    }
+def get_read_messages(batch_reference: str, timeout: float = REQUEST_TIMEOUT) -> dict:
+    """Return every read status for the batch, gathered from all pages into a single response."""
+    read_messages = {}
+    data = []
 
-def get_statuses(batch_reference):
-    response = requests.get(
-        f"{os.getenv('COMMGT_BASE_URL')}/statuses",
-        headers={"x-api-key": os.getenv("API_KEY")},
-        params={"batchReference": batch_reference, "channel": "nhsapp", "supplierStatus": "read"},
-        timeout=10
-    )
-    return response
+    for page in get_read_message_pages(batch_reference, timeout=timeout):
+        data.extend(page.get("data", []))
+        read_messages = {**page, "data": data}
+
+    return read_messages
+
+
+def get_read_message_pages(batch_reference: str, timeout: float = REQUEST_TIMEOUT) -> Iterator[dict]:
+    """
+    Yield the batch's read statuses one page at a time, following next links until the last page.
+
+    Each page is only requested once the previous one has been consumed, so a caller that records
+    pages as they arrive holds a single page in memory. A failed request, or one refused because
+    the NHS Notify circuit breaker is open, yields an error page and ends the iteration.
+    """
+    next_page = None
+
+    while True:
+        try:
+            if next_page is None:
+                response = get_statuses(batch_reference, timeout=timeout)
+            else:
+                response = get_statuses_page(next_page, timeout=timeout)
+        except circuit_breaker.CircuitOpenError as e:
+            logging.warning("Skipped fetching messages that have been read for batch %s: %s", batch_reference, e)
+            yield {"status": "error", "message": str(e), "data": []}
+            return
+
+        if response.status_code != 201:
+            logging.error("Failed to fetch messages that have been read: %s ", response.text)
+            yield {
+                "status": "error",
+                "message": f"Failed to fetch messages that have been read: {response.text}",
+                "data": [],
+            }
+            return
+
+        page = json_codec.loads(response.content)
+        yield page
+
+        next_page = (page.get("links") or {}).get("next")
+
+        if not next_page:
+            return
+
+
+def get_statuses(batch_reference, timeout: float = REQUEST_TIMEOUT):
+    params = {"batchReference": batch_reference, "channel": "nhsapp", "supplierStatus": "read"}
+
+    return circuit_breaker.notify(lambda: retry.send(
+        rate_limiter.limited("statuses", lambda: http_session.session().get(
+            f"{os.getenv('COMMGT_BASE_URL')}/statuses",
+            headers={"x-api-key": os.getenv("API_KEY")},
+            params=params,
+            timeout=timeout
+        )),
+        f"Statuses request for batch {batch_reference}",
+    ))
+
+
+def get_statuses_page(next_page: str, timeout: float = REQUEST_TIMEOUT):
+    return circuit_breaker.notify(lambda: retry.send(
+        rate_limiter.limited("statuses", lambda: http_session.session().get(
+            urljoin(f"{os.getenv('COMMGT_BASE_URL')}/statuses", next_page),
+            headers={"x-api-key": os.getenv("API_KEY")},
+            timeout=timeout
+        )),
+        f"Statuses request for {next_page}",
+    ))
@@ -1,36 +1,66 @@
 import database
 
+READ_STATUS = "read"
+MAX_IN_LIST_SIZE = 1000
+
+
 def record_message_statuses(batch_id: str, json_data: dict):
+    """
+    Record read statuses for the batch, skipping messages already read in BCSS.
+    """
     response_codes = []
     message_references = [item['message_reference'] for item in json_data['data']]
 
+    if not message_references:
+        return response_codes
+
     with database.cursor() as cursor:
-        for message_reference in message_references:
-            response_codes.append(update_message_status(cursor, batch_id, message_reference))
+        unread = unread_message_references(cursor, batch_id, message_references)
+        message_references = [reference for reference in message_references if reference in unread]
 
-        cursor.connection.commit()
+        if message_references:
+            response_codes = update_message_statuses(cursor, batch_id, message_references)
+            cursor.connection.commit()
 
     return response_codes
 
 
-def update_message_status(cursor, batch_id: str, message_reference: str):
-    response_code = 1
-    var = cursor.var(int)
+def unread_message_references(cursor, batch_id: str, message_references: list[str]) -> set:
+    """Return which of the given message references are not yet read, checking at most MAX_IN_LIST_SIZE per query."""
+    unread = set()
+
+    for start in range(0, len(message_references), MAX_IN_LIST_SIZE):
+        binds = {f"reference_{i}": reference for i, reference in enumerate(message_references[start:start + MAX_IN_LIST_SIZE])}
+        cursor.execute(
+            "SELECT message_id FROM v_notify_message_queue WHERE batch_id = :batch_id AND message_status != :status "
+            f"AND message_id IN ({', '.join(':' + name for name in binds)})",
+            {"batch_id": batch_id, "status": READ_STATUS, **binds},
+        )
+        unread.update(row[0] for row in cursor.fetchall())
+
+    return unread
 
-    cursor.execute(
+
+def update_message_statuses(cursor, batch_id: str, message_references: list[str]) -> list:
+    """
+    Record a read status for every message reference in a single executemany round trip.
+
+    The function's return value for each row is collected through an arrayed out bind,
+    so the response codes line up with the message references passed in.
+    """
+    var = cursor.var(int, arraysize=len(message_references))
+    cursor.setinputsizes(out_val=var)
+
+    cursor.executemany(
         """
             begin
                 :out_val := pkg_notify_wrap.f_update_message_status(:in_val1, :in_val2, :in_val3);
             end;
         """,
-        {
-            "in_val1": batch_id,
-            "in_val2": message_reference,
-            "in_val3": "read",
-            "out_val": var,
-        },
+        [
+            {"in_val1": batch_id, "in_val2": message_reference, "in_val3": READ_STATUS}
+            for message_reference in message_references
+        ],
     )
 
-    response_code = var.getvalue()
-
-    return response_code
+    return [var.getvalue(idx) for idx in range(len(message_references))]
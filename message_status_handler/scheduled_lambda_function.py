@@ -1,35 +1,42 @@
+import circuit_breaker
 import comms_management
 import environment
+import http_session
 import json
 import logging as pylogging
 import os
 import batch_fetcher
 import message_status_recorder
+import rate_limiter
+import retry
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from time_budget import TimeBudget
 from typing import Dict, Any
 
 logging = pylogging.getLogger()
 logging.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
+environment.prefetch()
+http_session.session()
 
-def lambda_handler(_event: Any, _context: Any) -> Dict[str, Any]:
+MAX_CONCURRENT_REQUESTS = 4
+BATCH_ESTIMATE_SECONDS = 15
+
+
+def lambda_handler(_event: Any, context: Any) -> Dict[str, Any]:
     logging.info("Message status handler started.")
     environment.seed()
+    retry.reset_budget()
+    rate_limiter.reset_metrics()
     results = {}
+    budget = TimeBudget(context, float(os.getenv("BATCH_ESTIMATE_SECONDS", str(BATCH_ESTIMATE_SECONDS))))
     try:
         batch_ids = batch_fetcher.fetch_batch_ids()
-        for batch_id in batch_ids:
-            results[batch_id] = {}
-            messages_with_read_status = comms_management.get_read_messages(batch_id)
-            logging.info(
-                "Processing %s messages with read status for batch_id: %s", 
-                len(messages_with_read_status),
-                batch_id
-            )
-            results[batch_id]["notification_status"] = messages_with_read_status
-
-            if len(messages_with_read_status) > 0:
-                bcss_responses = message_status_recorder.record_message_statuses(batch_id, messages_with_read_status)
-                results[batch_id]["bcss_response"] = bcss_responses
+        for batch_id, synced in sync_read_messages(batch_ids, budget):
+            results[batch_id] = synced
+
+        logging.info("Rate limiter metrics: %s", rate_limiter.metrics())
 
         return {
             "statusCode": 200,
@@ -37,6 +44,8 @@ def lambda_handler(_event: Any, _context: Any) -> Dict[str, Any]:
                 {
                     "message": "Message status handler finished",
                     "data": results,
+                    "continuation": budget.exhausted,
+                    "circuit_breakers": circuit_breaker.states(),
                 }
             ),
         }
@@ -44,5 +53,76 @@ def lambda_handler(_event: Any, _context: Any) -> Dict[str, Any]:
     except Exception as e:
         return {
             "statusCode": 500,
-            "body": json.dumps({"message": f"Internal Server Error: {e}"}),
+            "body": json.dumps(
+                {"message": f"Internal Server Error: {e}", "circuit_breakers": circuit_breaker.states()}
+            ),
         }
+
+
+def sync_read_messages(batch_ids: list, budget: TimeBudget):
+    """
+    Sync read statuses for each batch over a bounded worker pool.
+
+    Yields (batch_id, sync summary) pairs as each batch completes. A new batch is only
+    started while the budget says it can finish, with the time taken to fetch and record
+    all of its pages counted as the cost of a batch. No new batch is started while the
+    NHS Notify circuit breaker is open.
+    """
+    timeout = float(os.getenv("STATUSES_REQUEST_TIMEOUT", str(comms_management.REQUEST_TIMEOUT)))
+    max_workers = max(1, int(os.getenv("MAX_CONCURRENT_REQUESTS", str(MAX_CONCURRENT_REQUESTS))))
+    notify = circuit_breaker.circuit("notify")
+    pending = list(reversed(batch_ids))
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while True:
+                while pending and len(futures) < max_workers and budget.can_start() and notify.available():
+                    batch_id = pending.pop()
+                    future = executor.submit(sync_batch, batch_id, timeout)
+                    futures[future] = (batch_id, time.monotonic())
+
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_id, started_at = futures.pop(future)
+                    budget.record(time.monotonic() - started_at)
+                    yield batch_id, future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def sync_batch(batch_id: str, timeout: float) -> dict:
+    """
+    Record the batch's read statuses page by page.
+
+    Each page is committed before the next page is requested, so only one page is held
+    at a time. Pages recorded before a timeout are fetched again on the next run, and the
+    messages they mark as read are skipped when recording. A page that could not be
+    fetched, or was refused by the NHS Notify circuit breaker, is reported as the
+    batch's error.
+    """
+    synced = {"pages": 0, "read_messages": 0}
+
+    for page in comms_management.get_read_message_pages(batch_id, timeout):
+        if page.get("status") == "error":
+            synced["error"] = page.get("message")
+            continue
+
+        messages_with_read_status = page.get("data", [])
+        synced["pages"] += 1
+        synced["read_messages"] += len(messages_with_read_status)
+        logging.info(
+            "Processing %s messages with read status for batch_id: %s",
+            len(messages_with_read_status),
+            batch_id
+        )
+
+        if len(messages_with_read_status) > 0:
+            bcss_responses = message_status_recorder.record_message_statuses(batch_id, page)
+            synced.setdefault("bcss_response", []).extend(bcss_responses)
+
+    return synced
@@ -0,0 +1,148 @@
+"""Circuit breakers that stop calls to NHS Notify or the database while either is failing."""
+
+from lazy import Lazy
+import logging
+import os
+import threading
+import time
+from typing import Callable, TypeVar
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = 5
+COOL_DOWN_SECONDS = 30
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that opens after consecutive failures of a dependency.
+
+    While open every call is refused without reaching the dependency. Once the cool-down
+    has passed the breaker is half open and lets a single trial call through: success closes
+    it, failure opens it for another cool-down.
+    """
+
+    def __init__(self, threshold: int, cool_down: float) -> None:
+        self.failure_threshold = threshold
+        self.cool_down_seconds = cool_down
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Return whether a call would currently be let through, without taking the half-open trial."""
+        with self._lock:
+            self._half_open_after_cool_down()
+            return self.state == CLOSED or (self.state == HALF_OPEN and not self._trial)
+
+    def allow(self) -> bool:
+        """Return whether a call may go ahead, taking the trial call when the breaker is half open."""
+        with self._lock:
+            self._half_open_after_cool_down()
+
+            if self.state == CLOSED:
+                return True
+
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+
+            return False
+
+    def record(self, succeeded: bool):
+        """Record the outcome of a call that allow() let through."""
+        with self._lock:
+            self._trial = False
+
+            if succeeded:
+                self.state = CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = now()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._half_open_after_cool_down()
+            return {"state": self.state, "failures": self.failures}
+
+    def _half_open_after_cool_down(self):
+        if self.state == OPEN and now() - self.opened_at >= self.cool_down_seconds:
+            self.state = HALF_OPEN
+
+
+def guarded(name: str, request: Callable[[], T], failed: Callable[[T], bool], errors: tuple = (Exception,)) -> T:
+    """
+    Make a request through the named breaker, raising CircuitOpenError instead while it is open.
+
+    A result for which failed() is true, or one of the given errors, counts as a failure.
+    Any other exception is raised without counting against the dependency.
+    """
+    breaker = circuit(name)
+
+    if not breaker.allow():
+        raise CircuitOpenError(f"The {name} circuit breaker is open")
+
+    succeeded = True
+
+    try:
+        result = request()
+        succeeded = not failed(result)
+        return result
+    except errors:
+        succeeded = False
+        raise
+    finally:
+        breaker.record(succeeded)
+
+        if not succeeded and not breaker.available():
+            logging.warning("The %s circuit breaker is open: %s", name, breaker.snapshot())
+
+
+def notify(request: Callable[[], requests.Response]) -> requests.Response:
+    """Make an NHS Notify request through the notify breaker, counting server errors and lost connections as failures."""
+    return guarded("notify", request, lambda response: response.status_code >= 500, (requests.ConnectionError, requests.Timeout))
+
+
+def circuit(name: str) -> CircuitBreaker:
+    return _BREAKERS.get(name)
+
+
+def states() -> dict:
+    """Return the state and consecutive failure count of each breaker."""
+    return {name: breaker.snapshot() for (name,), breaker in _BREAKERS.items()}
+
+
+def reset():
+    """Forget every breaker, so the next call finds each dependency closed."""
+    _BREAKERS.clear()
+
+
+def failure_threshold() -> int:
+    return max(1, int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", str(FAILURE_THRESHOLD))))
+
+
+def cool_down_seconds() -> float:
+    return float(os.getenv("CIRCUIT_BREAKER_COOL_DOWN_SECONDS", str(COOL_DOWN_SECONDS)))
+
+
+def now() -> float:
+    return time.monotonic()
+
+
+_BREAKERS: Lazy[CircuitBreaker] = Lazy(lambda _name: CircuitBreaker(failure_threshold(), cool_down_seconds()))
@@ -1,8 +1,20 @@
+import circuit_breaker
 from contextlib import contextmanager
+from lazy import Lazy
 import logging
 import oracledb
 import os
 
+POOL_MIN = 1
+POOL_MAX = 4
+POOL_INCREMENT = 1
+POOL_PING_INTERVAL = 60
+
+# Errors that mean the database could not be reached, as opposed to a statement failing.
+UNAVAILABLE_ERRORS = (oracledb.OperationalError, oracledb.InterfaceError)
+
+_POOL: Lazy[oracledb.ConnectionPool] = Lazy(lambda: oracledb.create_pool(**connection_params(), **pool_params()))
+
 
 class DatabaseConnectionError(Exception):
     """Raised when there is an error connecting to the database"""
@@ -10,15 +22,31 @@ class DatabaseConnectionError(Exception):
 
 @contextmanager
 def connection():
+    """
+    Acquire a pooled connection through the database circuit breaker.
+
+    Connection-level errors count against the breaker. While it is open a
+    DatabaseConnectionError is raised without waiting on the pool.
+    """
+    breaker = circuit_breaker.circuit("database")
+
+    if not breaker.allow():
+        raise DatabaseConnectionError("Error Connecting to Database: the database circuit breaker is open")
+
+    available = True
+
     try:
-        conn = oracledb.connect(**connection_params())
+        conn = pool().acquire()
         try:
             yield conn
         finally:
             conn.close()
     except oracledb.Error as e:
+        available = not isinstance(e, UNAVAILABLE_ERRORS)
         logging.error("Error Connecting to Database: %s", e)
         raise DatabaseConnectionError(f"Error Connecting to Database: {str(e)}") from e
+    finally:
+        breaker.record(available)
 
 
 @contextmanager
@@ -36,6 +64,22 @@ def cursor():
         raise DatabaseConnectionError(f"Error Creating Cursor: {str(e)}") from e
 
 
+def pool() -> oracledb.ConnectionPool:
+    return _POOL.get()
+
+
+def close_pool(force: bool = False):
+    """Drain and close the connection pool so the next call to pool() creates a fresh one."""
+    current_pool = _POOL.pop()
+
+    if current_pool is not None:
+        try:
+            current_pool.close(force=force)
+        except oracledb.Error as e:
+            logging.error("Error Closing Connection Pool: %s", e)
+            raise DatabaseConnectionError(f"Error Closing Connection Pool: {str(e)}") from e
+
+
 def connection_params() -> dict:
     db_user = os.getenv("DATABASE_USER")
     db_password = os.getenv("DATABASE_PASSWORD")
@@ -45,3 +89,13 @@ def connection_params() -> dict:
     dsn_tns = f"{host}:{port}/{sid}"
 
     return {"user": db_user, "password": db_password, "dsn": dsn_tns}
+
+
+def pool_params() -> dict:
+    return {
+        "min": int(os.getenv("DATABASE_POOL_MIN", str(POOL_MIN))),
+        "max": int(os.getenv("DATABASE_POOL_MAX", str(POOL_MAX))),
+        "increment": int(os.getenv("DATABASE_POOL_INCREMENT", str(POOL_INCREMENT))),
+        "ping_interval": int(os.getenv("DATABASE_POOL_PING_INTERVAL", str(POOL_PING_INTERVAL))),
+        "getmode": oracledb.POOL_GETMODE_WAIT,
+    }
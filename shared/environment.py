@@ -1,8 +1,11 @@
 # pylint: disable=duplicate-code
 import json
+import logging
 import os
-import requests
+import threading
 import time
+from typing import Optional
+import requests
 
 KEYS = [
   "API_KEY",
@@ -19,31 +22,118 @@ KEYS = [
   "PRIVATE_KEY"
 ]
 
+SECRETS_TTL_SECONDS = 300
+
+
 class FetchSecretsError(BaseException):
     """Custom exception for fetch secrets errors."""
 
 
+class SecretsCache:
+    """When the secrets were last fetched, the fetch refreshing them and the keys they seeded."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.fetched_at: Optional[float] = None
+        self.fetch: Optional[threading.Thread] = None
+        self.seeded_keys: set = set()
+        self.error: Optional[FetchSecretsError] = None
+
+    def clear(self):
+        self.fetched_at = None
+        self.fetch = None
+        self.seeded_keys = set()
+        self.error = None
+
+
+_SECRETS = SecretsCache()
+
+
 def seed():
-    if os.getenv("SECRET_ARN") and not bool(os.getenv("ENVIRONMENT_SEEDED")):
-        headers = {"X-Aws-Parameters-Secrets-Token": os.getenv('AWS_SESSION_TOKEN')}
-        endpoint = f"http://localhost:2773/secretsmanager/get?secretId={os.getenv('SECRET_ARN')}&versionStage=AWSCURRENT"
-        attempts = 0
-        secrets = None
-
-        while not secrets and attempts < 5:
-            try:
-                r = requests.get(endpoint, headers=headers, timeout=30)
-                secrets = json.loads(r.text)["SecretString"]
-            except requests.ConnectionError:
-                attempts += 1
-                time.sleep(attempts * 0.5)
-
-        if not secrets:
-            raise FetchSecretsError("Failed to retrieve secrets from AWS Secrets Manager")
-
-        secrets_dict = json.loads(secrets)
-
-        for key in KEYS:
-            if key not in os.environ and key.lower() in secrets_dict:
-                os.environ[key] = secrets_dict[key.lower()]
-        os.environ["ENVIRONMENT_SEEDED"] = "true"
+    """
+    Populate the environment from the cached secrets, fetching them on first use.
+
+    Stale secrets are refreshed in the background while the cached values carry on being used.
+    """
+    if not os.getenv("SECRET_ARN"):
+        return
+
+    with _SECRETS.lock:
+        fetched_at = _SECRETS.fetched_at
+
+    if fetched_at is None:
+        if bool(os.getenv("ENVIRONMENT_SEEDED")):
+            return
+
+        prefetch().join()
+
+        with _SECRETS.lock:
+            if _SECRETS.fetched_at is None:
+                error, _SECRETS.error = _SECRETS.error, None
+                raise error or FetchSecretsError("Failed to retrieve secrets from AWS Secrets Manager")
+    elif time.monotonic() - fetched_at >= secrets_ttl_seconds():
+        prefetch()
+
+
+def prefetch() -> threading.Thread:
+    """Start fetching the secrets on a background thread, unless a fetch is already running."""
+    with _SECRETS.lock:
+        if _SECRETS.fetch is None and os.getenv("SECRET_ARN"):
+            _SECRETS.fetch = threading.Thread(target=refresh, daemon=True)
+            _SECRETS.fetch.start()
+
+        return _SECRETS.fetch
+
+
+def refresh():
+    """Fetch the secrets and apply them to the environment, keeping the cached ones if the fetch fails."""
+    try:
+        secrets_dict = fetch_secrets()
+
+        with _SECRETS.lock:
+            for key in KEYS:
+                if (key not in os.environ or key in _SECRETS.seeded_keys) and key.lower() in secrets_dict:
+                    os.environ[key] = secrets_dict[key.lower()]
+                    _SECRETS.seeded_keys.add(key)
+
+            _SECRETS.fetched_at = time.monotonic()
+            _SECRETS.error = None
+            os.environ["ENVIRONMENT_SEEDED"] = "true"
+    except (FetchSecretsError, requests.RequestException, KeyError, ValueError) as e:
+        logging.error("Error fetching secrets: %s", e)
+
+        with _SECRETS.lock:
+            _SECRETS.error = e if isinstance(e, FetchSecretsError) else FetchSecretsError(str(e))
+    finally:
+        with _SECRETS.lock:
+            _SECRETS.fetch = None
+
+
+def fetch_secrets() -> dict:
+    headers = {"X-Aws-Parameters-Secrets-Token": os.getenv('AWS_SESSION_TOKEN')}
+    endpoint = f"http://localhost:2773/secretsmanager/get?secretId={os.getenv('SECRET_ARN')}&versionStage=AWSCURRENT"
+    attempts = 0
+    secrets = None
+
+    while not secrets and attempts < 5:
+        try:
+            r = requests.get(endpoint, headers=headers, timeout=30)
+            secrets = json.loads(r.text)["SecretString"]
+        except requests.ConnectionError:
+            attempts += 1
+            time.sleep(attempts * 0.5)
+
+    if not secrets:
+        raise FetchSecretsError("Failed to retrieve secrets from AWS Secrets Manager")
+
+    return json.loads(secrets)
+
+
+def reset():
+    """Forget the cached secrets so the next call to seed() fetches them again."""
+    with _SECRETS.lock:
+        _SECRETS.clear()
+
+
+def secrets_ttl_seconds() -> float:
+    return float(os.getenv("SECRETS_TTL_SECONDS", str(SECRETS_TTL_SECONDS)))
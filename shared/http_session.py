@@ -0,0 +1,35 @@
+from lazy import Lazy
+import os
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 10
+
+
+def session() -> requests.Session:
+    return _SESSION.get()
+
+
+def close_session():
+    current_session = _SESSION.pop()
+
+    if current_session is not None:
+        current_session.close()
+
+
+def build_session() -> requests.Session:
+    http_session = requests.Session()
+    http_session.headers["Connection"] = "keep-alive"
+
+    adapter = HTTPAdapter(
+        pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", str(POOL_CONNECTIONS))),
+        pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", str(POOL_MAXSIZE))),
+    )
+    http_session.mount("https://", adapter)
+    http_session.mount("http://", adapter)
+
+    return http_session
+
+
+_SESSION: Lazy[requests.Session] = Lazy(build_session)
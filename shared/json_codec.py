@@ -0,0 +1,45 @@
+"""JSON encoding and decoding for NHS Notify payloads, using orjson when it is installed."""
+
+import json
+from json.encoder import encode_basestring
+from typing import Any, Union
+
+try:
+    import orjson  # pylint: disable=import-error
+except ImportError:
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON.
+
+    Both backends produce the same bytes for the payloads sent to NHS Notify: keys in
+    insertion order, no whitespace and non-ASCII characters left unescaped.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def encode_string(value: Any) -> str:
+    """Return the JSON literal for a single string value, or null for None, matching dumps()."""
+    if value is None:
+        return "null"
+
+    if isinstance(value, str):
+        return encode_basestring(value)
+
+    return dumps(value).decode("utf-8")
+
+
+def backend() -> str:
+    return "orjson" if orjson is not None else "json"
@@ -0,0 +1,41 @@
+"""Values created on first use and shared by every thread in the process."""
+
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """
+    Values built by a factory on first use, one for each distinct set of arguments.
+
+    Values live at module level in the modules that create them, so warm Lambda
+    invocations reuse whatever the previous invocation built.
+    """
+
+    def __init__(self, factory: Callable[..., T]) -> None:
+        self._factory = factory
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, *args) -> T:
+        with self._lock:
+            if args not in self._values:
+                self._values[args] = self._factory(*args)
+
+            return self._values[args]
+
+    def items(self) -> list:
+        """Return the (arguments, value) pairs built so far."""
+        with self._lock:
+            return list(self._values.items())
+
+    def pop(self, *args):
+        """Forget the value built for the arguments, returning it, or None if there was none."""
+        with self._lock:
+            return self._values.pop(args, None)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
@@ -0,0 +1,179 @@
+"""Client-side rate limiting of outbound NHS Notify requests, shared by every thread in the process."""
+
+from lazy import Lazy
+import logging
+import os
+import retry
+import threading
+import time
+from typing import Callable, Optional
+import requests
+
+RATES_PER_SECOND = {"message_batch": 5.0, "statuses": 20.0}
+DEFAULT_RATE_PER_SECOND = 10.0
+MIN_RATE_FRACTION = 0.05
+BACKOFF_FACTOR = 0.5
+RECOVERY_FRACTION = 0.05
+EPOCH_THRESHOLD_SECONDS = 1_000_000_000
+MIN_PAUSE_SECONDS = 0.001
+
+
+class TokenBucket:
+    """
+    Token bucket that slows down when NHS Notify pushes back.
+
+    Requests take a token each, refilled at the current rate up to a burst of one second's
+    worth. A 429 halves the rate and, with a Retry-After, holds every request until then;
+    rate limit headers reporting no remaining quota hold requests until the quota resets.
+    Each successful response then recovers a little of the configured rate.
+    """
+
+    def __init__(self, max_rate: float) -> None:
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.tokens = self.capacity
+        self.updated = now()
+        self.hold_until = 0.0
+        self.metrics = {"requests": 0, "waits": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "throttled": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> float:
+        return max(1.0, self.max_rate)
+
+    def acquire(self) -> float:
+        """Block until a request may be made, returning the seconds spent waiting."""
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                current = now()
+                self._refill(current)
+
+                if current >= self.hold_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self._record_wait(waited)
+                    return waited
+
+                delay = max(self.hold_until - current, (1 - self.tokens) / self.rate, MIN_PAUSE_SECONDS)
+
+            pause(delay)
+            waited += delay
+
+    def observe(self, response: requests.Response):
+        """Adapt the rate to a response's status code and rate limit headers."""
+        with self._lock:
+            current = now()
+
+            if response.status_code == 429:
+                self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate * BACKOFF_FACTOR)
+                self.metrics["throttled"] += 1
+                self._hold(current, retry.retry_after_seconds(response))
+            elif response.status_code < 400:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION)
+
+            remaining = header_number(response, "RateLimit-Remaining", "X-RateLimit-Remaining")
+
+            if remaining is not None and remaining < 1:
+                self._hold(current, reset_seconds(header_number(response, "RateLimit-Reset", "X-RateLimit-Reset")))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.metrics, "rate": self.rate}
+
+    def reset_metrics(self):
+        with self._lock:
+            self.metrics = {key: type(value)() for key, value in self.metrics.items()}
+
+    def _hold(self, current: float, seconds: Optional[float]):
+        self.tokens = 0
+        self.updated = current
+
+        if seconds:
+            self.hold_until = max(self.hold_until, current + seconds)
+            self.updated = self.hold_until
+
+    def _refill(self, current: float):
+        if current > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (current - self.updated) * self.rate)
+            self.updated = current
+
+    def _record_wait(self, waited: float):
+        self.metrics["requests"] += 1
+
+        if waited > 0:
+            self.metrics["waits"] += 1
+            self.metrics["wait_seconds"] += waited
+            self.metrics["max_wait_seconds"] = max(self.metrics["max_wait_seconds"], waited)
+
+
+def limited(name: str, request: Callable[[], requests.Response]) -> Callable[[], requests.Response]:
+    """Wrap a request so each call waits for the named limiter and feeds the response back to it."""
+    def limited_request() -> requests.Response:
+        bucket = limiter(name)
+        waited = bucket.acquire()
+
+        if waited > 0:
+            logging.info("Waited %.2fs for the %s rate limit", waited, name)
+
+        response = request()
+        bucket.observe(response)
+        return response
+
+    return limited_request
+
+
+def limiter(name: str) -> TokenBucket:
+    return _LIMITERS.get(name)
+
+
+def metrics() -> dict:
+    """Return each limiter's request count, time spent waiting, current rate and number of 429s."""
+    return {name: bucket.snapshot() for (name,), bucket in _LIMITERS.items()}
+
+
+def reset_metrics():
+    for _, bucket in _LIMITERS.items():
+        bucket.reset_metrics()
+
+
+def reset():
+    """Forget every limiter, so the next request starts from the configured rates."""
+    _LIMITERS.clear()
+
+
+def rate_per_second(name: str) -> float:
+    default = RATES_PER_SECOND.get(name, DEFAULT_RATE_PER_SECOND)
+    return max(0.001, float(os.getenv(f"RATE_LIMIT_{name.upper()}_PER_SECOND", str(default))))
+
+
+def header_number(response: requests.Response, *names: str) -> Optional[float]:
+    for name in names:
+        value = response.headers.get(name)
+
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+
+    return None
+
+
+def reset_seconds(value: Optional[float]) -> Optional[float]:
+    """Interpret a rate limit reset given either as seconds from now or as a Unix timestamp."""
+    if value is not None and value > EPOCH_THRESHOLD_SECONDS:
+        return max(0.0, value - time.time())
+
+    return value
+
+
+def now() -> float:
+    return time.monotonic()
+
+
+def pause(seconds: float):
+    time.sleep(seconds)
+
+
+_LIMITERS: Lazy[TokenBucket] = Lazy(lambda name: TokenBucket(rate_per_second(name)))
@@ -0,0 +1,112 @@
+"""Retries for outbound NHS Notify and OAuth2 requests."""
+
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+import requests
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+MAX_ATTEMPTS = 4
+BASE_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 8
+MAX_RETRY_AFTER_SECONDS = 30
+RETRY_BUDGET = 20
+
+_BUDGET_LOCK = threading.Lock()
+_BUDGET: dict = {}
+
+
+def send(request: Callable[[], requests.Response], description: str) -> requests.Response:
+    """
+    Make a request, retrying connection errors, timeouts and retryable status codes.
+
+    Retries wait for the Retry-After the server asked for, or otherwise back off exponentially
+    with full jitter. Each retry spends one from the per-invocation retry budget, so a struggling
+    API is not hammered with retries across every batch. The request callable is made again
+    unchanged, so callers must build anything that identifies the request, such as the message
+    batch reference and correlation ID, outside it so the API can deduplicate the retry.
+    Once the attempts or budget run out the last response is returned, or the last error raised.
+    """
+    max_attempts = max(1, int(os.getenv("RETRY_MAX_ATTEMPTS", str(MAX_ATTEMPTS))))
+    attempt = 1
+
+    while True:
+        try:
+            response = request()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_attempts or not take_retry():
+                raise
+
+            delay = backoff_seconds(attempt)
+            logging.warning("%s failed: %s. Retrying in %.2fs (attempt %s)", description, e, delay, attempt + 1)
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= max_attempts:
+                return response
+
+            delay = retry_after_seconds(response)
+
+            if delay is None:
+                delay = backoff_seconds(attempt)
+            elif delay > MAX_RETRY_AFTER_SECONDS:
+                logging.warning("%s asked to retry after %.0fs, giving up", description, delay)
+                return response
+
+            if not take_retry():
+                return response
+
+            logging.warning(
+                "%s returned %s. Retrying in %.2fs (attempt %s)", description, response.status_code, delay, attempt + 1
+            )
+
+        pause(delay)
+        attempt += 1
+
+
+def backoff_seconds(attempt: int) -> float:
+    return random.uniform(0, min(MAX_DELAY_SECONDS, BASE_DELAY_SECONDS * 2 ** (attempt - 1)))
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Return the delay requested by a Retry-After header, given either in seconds or as an HTTP date."""
+    retry_after = response.headers.get("Retry-After")
+
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def take_retry() -> bool:
+    """Spend one retry from the invocation's budget, returning False once it is exhausted."""
+    with _BUDGET_LOCK:
+        remaining = _BUDGET.get("remaining", int(os.getenv("RETRY_BUDGET", str(RETRY_BUDGET))))
+
+        if remaining <= 0:
+            return False
+
+        _BUDGET["remaining"] = remaining - 1
+        return True
+
+
+def reset_budget():
+    """Restore the retry budget at the start of an invocation."""
+    with _BUDGET_LOCK:
+        _BUDGET.clear()
+
+
+def pause(seconds: float):
+    time.sleep(seconds)
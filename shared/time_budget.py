@@ -0,0 +1,50 @@
+import os
+import threading
+from typing import Optional
+
+DEADLINE_MARGIN_MILLIS = 10000
+SMOOTHING = 0.3
+
+
+class TimeBudget:
+    """
+    Decides whether another unit of work fits in the Lambda's remaining time.
+
+    The cost of a unit is estimated from observed durations: the estimate rises straight to
+    any slower observation and decays towards faster ones, so it errs on the side of stopping.
+    Without a Lambda context (e.g. when invoked locally) the budget is unlimited.
+    """
+
+    def __init__(self, context: object, initial_estimate_seconds: float) -> None:
+        self.context = context
+        self.estimate_seconds = initial_estimate_seconds
+        self.margin_seconds = int(os.getenv("DEADLINE_MARGIN_MILLIS", str(DEADLINE_MARGIN_MILLIS))) / 1000
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def remaining_seconds(self) -> Optional[float]:
+        get_remaining_time_in_millis = getattr(self.context, "get_remaining_time_in_millis", None)
+
+        if get_remaining_time_in_millis is None:
+            return None
+
+        return get_remaining_time_in_millis() / 1000
+
+    def can_start(self) -> bool:
+        remaining = self.remaining_seconds()
+
+        if remaining is None:
+            return True
+
+        with self._lock:
+            if remaining - self.estimate_seconds < self.margin_seconds:
+                self.exhausted = True
+
+            return not self.exhausted
+
+    def record(self, elapsed_seconds: float):
+        with self._lock:
+            if elapsed_seconds >= self.estimate_seconds:
+                self.estimate_seconds = elapsed_seconds
+            else:
+                self.estimate_seconds = SMOOTHING * elapsed_seconds + (1 - SMOOTHING) * self.estimate_seconds
@@ -24,6 +24,10 @@ module "lambdas" {
   secrets_arn    = var.secrets_arn
   sqs_queue_arn  = module.sqs.sqs_queue_arn
 
+  batch_queue_arn               = module.batch_queue.sqs_queue_arn
+  batch_queue_url               = module.batch_queue.sqs_queue_url
+  batch_queue_max_receive_count = module.batch_queue.max_receive_count
+
   batch_notification_processor_lambda_role_arn = module.iam.batch_notification_processor_lambda_role_arn
   message_status_handler_lambda_role_arn       = module.iam.message_status_handler_lambda_role_arn
   python_packages_layer_arn                    = module.lambda_layer.python_packages_layer_arn
@@ -45,6 +49,17 @@ module "sqs" {
   tags        = var.tags
 }
 
+module "batch_queue" {
+  source      = "./modules/sqs"
+  team        = var.team
+  project     = var.project
+  environment = var.environment
+  name        = "batch-sqs"
+  tags        = var.tags
+
+  max_receive_count = 5
+}
+
 module "eventbridge" {
   source      = "./modules/eventbridge"
   team        = var.team
@@ -65,6 +80,7 @@ module "iam" {
   kms_arn                    = var.kms_arn
   secrets_arn                = var.secrets_arn
   sqs_queue_arn              = module.sqs.sqs_queue_arn
+  batch_queue_arn            = module.batch_queue.sqs_queue_arn
   notification_s3_bucket_arn = module.s3.bucket_arn
   tags                       = var.tags
 }
@@ -188,6 +188,19 @@ data "aws_iam_policy_document" "batch_notification_processor_sqs_policy_document
 
     resources = [
       var.sqs_queue_arn,
+      var.batch_queue_arn,
+    ]
+  }
+
+  statement {
+    actions = [
+      "sqs:ReceiveMessage",
+      "sqs:DeleteMessage",
+      "sqs:GetQueueAttributes",
+    ]
+
+    resources = [
+      var.batch_queue_arn,
     ]
   }
 }
@@ -25,6 +25,11 @@ variable "sqs_queue_arn" {
   description = "ARN for the BCSS Communication Management SQS Queue"
 }
 
+variable "batch_queue_arn" {
+  type        = string
+  description = "ARN for the SQS Queue of batches fanned out to the batch notification processor"
+}
+
 variable "notification_s3_bucket_arn" {
   type        = string
   description = "ARN for the BCSS Communication Management S3 Bucket"
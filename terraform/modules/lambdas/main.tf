@@ -38,12 +38,14 @@ resource "aws_lambda_function" "batch_notification_processor" {
 
   environment {
     variables = {
-      COMMGT_BASE_URL = local.secrets["commgt_base_url"]
-      DATABASE_PORT   = local.secrets["database_port"]
-      ENVIRONMENT     = var.environment
-      OAUTH_TOKEN_URL = local.secrets["oauth_token_url"]
-      REGION_NAME     = var.region
-      SECRET_ARN      = var.secrets_arn
+      COMMGT_BASE_URL               = local.secrets["commgt_base_url"]
+      DATABASE_PORT                 = local.secrets["database_port"]
+      BATCH_QUEUE_URL               = var.batch_queue_url
+      BATCH_QUEUE_MAX_RECEIVE_COUNT = var.batch_queue_max_receive_count
+      ENVIRONMENT                   = var.environment
+      OAUTH_TOKEN_URL               = local.secrets["oauth_token_url"]
+      REGION_NAME                   = var.region
+      SECRET_ARN                    = var.secrets_arn
 
       LAMBDA_STATUS_CHECK_ARN      = aws_lambda_function.message_status_handler.arn
       LAMBDA_STATUS_CHECK_ROLE_ARN = var.message_status_handler_lambda_role_arn
@@ -116,3 +118,10 @@ resource "aws_lambda_permission" "allow_sqs_to_call_lambda" {
   principal     = "sqs.amazonaws.com"
   source_arn    = var.sqs_queue_arn
 }
+
+resource "aws_lambda_event_source_mapping" "batch_queue_trigger" {
+  event_source_arn        = var.batch_queue_arn
+  function_name           = aws_lambda_function.batch_notification_processor.function_name
+  batch_size              = 1
+  function_response_types = ["ReportBatchItemFailures"]
+}
@@ -55,6 +55,21 @@ variable "sqs_queue_arn" {
   description = "ARN for the SQS Queue"
 }
 
+variable "batch_queue_arn" {
+  type        = string
+  description = "ARN for the SQS Queue of batches fanned out to the batch notification processor"
+}
+
+variable "batch_queue_url" {
+  type        = string
+  description = "URL for the SQS Queue of batches fanned out to the batch notification processor"
+}
+
+variable "batch_queue_max_receive_count" {
+  type        = number
+  description = "Receives of a batch queue record before it is moved to the dead-letter queue"
+}
+
 variable "subnet_ids" {
   type        = list(string)
   description = "Ids for subnets"
@@ -1,9 +1,21 @@
 resource "aws_sqs_queue" "sqs_queue" {
-  name                       = "${var.team}-${var.project}-sqs-${var.environment}"
+  name                       = "${var.team}-${var.project}-${var.name}-${var.environment}"
   delay_seconds              = 0
   max_message_size           = 262144
   message_retention_seconds  = 345600
   receive_wait_time_seconds  = 0
   visibility_timeout_seconds = 300
   tags                       = var.tags
-}
\ No newline at end of file
+
+  redrive_policy = var.max_receive_count > 0 ? jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.dead_letter_queue[0].arn
+    maxReceiveCount     = var.max_receive_count
+  }) : null
+}
+
+resource "aws_sqs_queue" "dead_letter_queue" {
+  count                     = var.max_receive_count > 0 ? 1 : 0
+  name                      = "${var.team}-${var.project}-${var.name}-dlq-${var.environment}"
+  message_retention_seconds = 1209600
+  tags                      = var.tags
+}
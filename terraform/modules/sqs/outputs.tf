@@ -4,4 +4,12 @@ output "sqs_queue_arn" {
 
 output "sqs_queue_url" {
   value = aws_sqs_queue.sqs_queue.url
-}
\ No newline at end of file
+}
+
+output "dead_letter_queue_arn" {
+  value = var.max_receive_count > 0 ? aws_sqs_queue.dead_letter_queue[0].arn : null
+}
+
+output "max_receive_count" {
+  value = var.max_receive_count
+}
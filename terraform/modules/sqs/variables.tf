@@ -8,6 +8,12 @@ variable "project" {
   default = "comms"
 }
 
+variable "name" {
+  type        = string
+  default     = "sqs"
+  description = "Name of the queue, between the project and environment"
+}
+
 variable "environment" {
   type = string
 }
@@ -15,4 +21,10 @@ variable "environment" {
 variable "tags" {
   type        = map(string)
   description = "A map of tags to apply to the resource."
-}
\ No newline at end of file
+}
+
+variable "max_receive_count" {
+  type        = number
+  default     = 0
+  description = "Receives before a message is moved to a dead-letter queue, 0 for no dead-letter queue"
+}
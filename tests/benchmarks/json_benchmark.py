@@ -0,0 +1,97 @@
+"""
+Benchmark encoding message batch requests and decoding /statuses responses.
+
+Run with: python tests/benchmarks/json_benchmark.py
+Install orjson to compare the accelerated backend with the stdlib fallback.
+"""
+import json
+import os
+import sys
+import timeit
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR + "/../../batch_notification_processor")
+sys.path.insert(0, SCRIPT_DIR + "/../../shared")
+
+import batch_processor  # pylint: disable=wrong-import-position
+import json_codec  # pylint: disable=wrong-import-position
+from communication_management import CommunicationManagement  # pylint: disable=wrong-import-position
+from recipient import Recipient  # pylint: disable=wrong-import-position
+
+SIZES = [1_000, 10_000, 50_000]
+
+
+def request_body_dict(routing_plan_id: str, batch_reference: str, recipients: list) -> dict:
+    """The message batch request body as dicts, as it was built before it was encoded directly."""
+    return {
+        "data": {
+            "type": "MessageBatch",
+            "attributes": {
+                "routingPlanId": routing_plan_id,
+                "messageBatchReference": batch_reference,
+                "messages": [
+                    {"messageReference": r.message_id, "recipient": {"nhsNumber": r.nhs_number}, "personalisation": {}}
+                    for r in recipients
+                ],
+            },
+        }
+    }
+
+
+def report(name: str, size: int, func):
+    seconds = min(timeit.repeat(func, number=1, repeat=5))
+    print(f"{name:<36} {size:>6} messages {seconds * 1000:8.1f} ms {size / seconds:>12,.0f} messages/s")
+
+
+def statuses_response(references: list) -> bytes:
+    return json.dumps({
+        "status": "success",
+        "data": [
+            {
+                "channel": "nhsapp",
+                "channelStatus": "delivered",
+                "supplierStatus": "read",
+                "message_id": "2WL3qFTEFM0qMY8xjRbt1LIKCzM",
+                "message_reference": reference,
+            }
+            for reference in references
+        ],
+    }).encode("utf-8")
+
+
+def main():
+    print(f"json_codec backend: {json_codec.backend()}")
+    subject = CommunicationManagement()
+
+    for size in SIZES:
+        references = batch_processor.generate_references(size)
+        recipients = [Recipient((f"{i:010d}", reference)) for i, reference in enumerate(references)]
+        response = statuses_response(references)
+
+        print("batch notification processor: message batch request body")
+        report(
+            "dicts + json.dumps (stdlib)",
+            size,
+            lambda: json.dumps(
+                request_body_dict("routing_plan_id", "batch_reference", recipients),
+                separators=(",", ":"),
+            ).encode("utf-8"),
+        )
+        report(
+            "dicts + json_codec.dumps",
+            size,
+            lambda: json_codec.dumps(request_body_dict("routing_plan_id", "batch_reference", recipients)),
+        )
+        report(
+            "encode_batch_message_request_body",
+            size,
+            lambda: subject.encode_batch_message_request_body("routing_plan_id", "batch_reference", recipients),
+        )
+
+        print("message status handler: /statuses response")
+        report("json.loads (stdlib)", size, lambda: json.loads(response))
+        report("json_codec.loads", size, lambda: json_codec.loads(response))
+
+
+if __name__ == "__main__":
+    main()
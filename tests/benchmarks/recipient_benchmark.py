@@ -0,0 +1,59 @@
+"""
+Microbenchmark comparing Recipient construction time and memory per 100k rows.
+
+Run with: python tests/benchmarks/recipient_benchmark.py
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR + "/../../batch_notification_processor")
+
+from recipient import Recipient  # pylint: disable=wrong-import-position
+
+ROWS = 100_000
+
+
+class DictRecipient:
+    """The previous Recipient implementation, kept here as the baseline."""
+    ATTR_NAMES = Recipient.ATTR_NAMES
+
+    def __init__(self, attrs) -> None:
+        for idx, attr_name in enumerate(self.ATTR_NAMES):
+            setattr(self, attr_name, attrs[idx] if idx < len(attrs) else None)
+
+
+def rows() -> list[tuple]:
+    return [
+        (f"{9000000000 + i}", f"{i:08x}-0000-0000-0000-000000000000", "batch_id", "routing_plan_id", "requested",
+         "variable text", "1 Street", "Town", None, None, None, "AB1 2CD", "GP Practice")
+        for i in range(ROWS)
+    ]
+
+
+def construction_seconds(cls, data: list[tuple]) -> float:
+    return min(timeit.repeat(lambda: [cls(row) for row in data], number=1, repeat=5))
+
+
+def memory_bytes(cls, data: list[tuple]) -> int:
+    tracemalloc.start()
+    snapshot_start = tracemalloc.get_traced_memory()[0]
+    instances = [cls(row) for row in data]
+    used = tracemalloc.get_traced_memory()[0] - snapshot_start
+    tracemalloc.stop()
+    del instances
+    return used
+
+
+def main():
+    data = rows()
+    for name, cls in (("dict-based (previous)", DictRecipient), ("slotted", Recipient)):
+        seconds = construction_seconds(cls, data)
+        used = memory_bytes(cls, data)
+        print(f"{name:<24} {seconds * 1000:8.1f} ms / {ROWS} rows   {used / 1024 / 1024:8.1f} MiB / {ROWS} rows")
+
+
+if __name__ == "__main__":
+    main()
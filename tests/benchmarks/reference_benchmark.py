@@ -0,0 +1,50 @@
+"""
+Benchmark message reference generation and check uniqueness over millions of IDs.
+
+Run with: python tests/benchmarks/reference_benchmark.py
+"""
+import hashlib
+import os
+import sys
+import time
+import timeit
+import uuid
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR + "/../../batch_notification_processor")
+sys.path.insert(0, SCRIPT_DIR + "/../../shared")
+
+import batch_processor  # pylint: disable=wrong-import-position
+
+COUNT = 100_000
+STRESS_COUNT = 5_000_000
+
+
+def md5_reference(prefix="bcss_notify_message_reference") -> str:
+    """The previous generate_reference implementation, kept here as the baseline."""
+    str_val = f"{prefix}:{time.time()}"
+    return str(uuid.UUID(hashlib.md5(str_val.encode()).hexdigest()))
+
+
+def report(name: str, func):
+    seconds = min(timeit.repeat(func, number=1, repeat=5))
+    print(f"{name:<32} {seconds * 1000:8.1f} ms / {COUNT} ids   {seconds / COUNT * 1e9:8.0f} ns / id")
+
+
+def main():
+    report("md5 of time.time() (previous)", lambda: [md5_reference() for _ in range(COUNT)])
+    report("uuid.uuid4()", lambda: [str(uuid.uuid4()) for _ in range(COUNT)])
+    report("generate_reference()", lambda: [batch_processor.generate_reference() for _ in range(COUNT)])
+    report("generate_references(n)", lambda: batch_processor.generate_references(COUNT))
+
+    previous = len({md5_reference() for _ in range(COUNT)})
+    print(f"md5 of time.time() (previous): {previous} unique out of {COUNT}")
+
+    references = batch_processor.generate_references(STRESS_COUNT)
+    unique = len(set(references))
+    print(f"generate_references: {unique} unique out of {STRESS_COUNT}")
+    assert unique == STRESS_COUNT
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark encoding and signing a message batch request body.
+
+Run with: python tests/benchmarks/signing_benchmark.py
+"""
+import hashlib
+import hmac
+import json
+import os
+import sys
+import timeit
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR + "/../../batch_notification_processor")
+sys.path.insert(0, SCRIPT_DIR + "/../../shared")
+
+import batch_processor  # pylint: disable=wrong-import-position
+from communication_management import CommunicationManagement  # pylint: disable=wrong-import-position
+from recipient import Recipient  # pylint: disable=wrong-import-position
+
+SIZES = [1_000, 10_000, 50_000]
+
+
+def sign_then_encode(subject: CommunicationManagement, request_body: dict) -> bytes:
+    """The previous send path: json.dumps to sign, then a second encode by requests for json=."""
+    hmac.new(bytes(subject.secret, "ASCII"), msg=bytes(json.dumps(request_body), "ASCII"), digestmod=hashlib.sha256).hexdigest()
+    return json.dumps(request_body, allow_nan=False).encode("utf-8")
+
+
+def encode_once_and_sign(subject: CommunicationManagement, recipients: list) -> bytes:
+    body = subject.encode_batch_message_request_body("routing_plan_id", "batch_reference", recipients)
+    subject.generate_hmac_signature(body)
+    return body
+
+
+def request_body_dict(routing_plan_id: str, batch_reference: str, recipients: list) -> dict:
+    """The message batch request body as dicts, as it was built before it was encoded directly."""
+    return {
+        "data": {
+            "type": "MessageBatch",
+            "attributes": {
+                "routingPlanId": routing_plan_id,
+                "messageBatchReference": batch_reference,
+                "messages": [
+                    {"messageReference": r.message_id, "recipient": {"nhsNumber": r.nhs_number}, "personalisation": {}}
+                    for r in recipients
+                ],
+            },
+        }
+    }
+
+
+def report(name: str, size: int, func):
+    seconds = min(timeit.repeat(func, number=1, repeat=5))
+    print(f"{name:<24} {size:>6} messages {seconds * 1000:8.1f} ms")
+
+
+def main():
+    subject = CommunicationManagement()
+    subject.secret = "application_id.api_key"
+
+    for size in SIZES:
+        recipients = [
+            Recipient((f"{i:010d}", reference)) for i, reference in enumerate(batch_processor.generate_references(size))
+        ]
+        request_body = request_body_dict("routing_plan_id", "batch_reference", recipients)
+
+        report("sign then encode", size, lambda: sign_then_encode(subject, request_body))
+        report("encode once and sign", size, lambda: encode_once_and_sign(subject, recipients))
+        print(
+            f"{'':<24} {size:>6} messages {len(json.dumps(request_body)):>9} bytes before, "
+            f"{len(encode_once_and_sign(subject, recipients)):>9} bytes after"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,10 @@ RESULT_CACHE (MODE DEFAULT)
 TABLESPACE MPI_NOTIFY_USER
 NOCOMPRESS;
 
+CREATE INDEX notify_message_queue_status_idx
+  ON notify_message_queue (message_status, read_datestamp, batch_id)
+  TABLESPACE MPI_NOTIFY_USER;
+
 CREATE TABLE notify_message_definition (
   message_definition_id         NUMBER (38) NOT NULL,
   routing_plan_id               VARCHAR2 (38) NOT NULL,
@@ -16,8 +16,6 @@ def test_batch_notification_processor_updates_message_queue(recipient_data, help
     batch_id_1 = str(uuid.uuid4())
     batch_id_2 = str(uuid.uuid4())
 
-    message_references = [r[1] for r in recipient_data]
-    batch_processor.generate_message_reference = Mock(side_effect=message_references)
     batch_processor.generate_batch_id = Mock(side_effect=[batch_id_1, batch_id_2, str(uuid.uuid4())])
 
     helpers.seed_message_queue(batch_id_1, recipient_data[:3], 1)
@@ -48,7 +46,10 @@ def test_batch_notification_processor_updates_message_queue(recipient_data, help
 
         for idx, result in enumerate(results):
             recipient = recipient_data[idx]
-            assert result == (batch_id_1, recipient[0], recipient[1], "sending")
+            assert result[0:2] == (batch_id_1, recipient[0])
+            assert result[2] != recipient[1]
+            assert str(uuid.UUID(result[2])) == result[2]
+            assert result[3] == "sending"
 
         cur.execute(
             """
@@ -62,16 +63,16 @@ def test_batch_notification_processor_updates_message_queue(recipient_data, help
         results = cur.fetchall()
 
         assert len(results) == 2
-        assert results[0] == (batch_id_2, recipient_data[3][0], recipient_data[3][1], "sending")
-        assert results[1] == (batch_id_2, recipient_data[4][0], recipient_data[4][1], "sending")
+        assert results[0][0:2] == (batch_id_2, recipient_data[3][0])
+        assert results[0][3] == "sending"
+        assert results[1][0:2] == (batch_id_2, recipient_data[4][0])
+        assert results[1][3] == "sending"
 
 
 def test_batch_notification_processor_payload(recipient_data, nhs_notify_message_batch_schema, helpers):
     """Test that the batch notification processor sends the correct payload to the CMAPI."""
     batch_id = str(uuid.uuid4())
-    message_references = [r[1] for r in recipient_data]
     helpers.seed_message_queue(batch_id, recipient_data)
-    batch_processor.generate_message_reference = Mock(side_effect=message_references)
     batch_processor.generate_batch_id = Mock(side_effect=[batch_id, str(uuid.uuid4())])
 
     with requests_mock.Mocker() as rm:
@@ -101,6 +102,15 @@ def test_batch_notification_processor_payload(recipient_data, nhs_notify_message
         == "e43a7d31-a287-485e-b1c2-f53cebbefba3"
     )
 
-    for idx, msg in enumerate(response_json["data"]["attributes"]["messages"]):
-        assert msg["recipient"]["nhsNumber"] == recipient_data[idx][0]
-        assert msg["messageReference"] == recipient_data[idx][1]
+    with helpers.cursor() as cur:
+        cur.execute(
+            "SELECT nhs_number, message_id FROM v_notify_message_queue WHERE batch_id = :batch_id",
+            batch_id=batch_id
+        )
+        message_ids = dict(cur.fetchall())
+
+    messages = response_json["data"]["attributes"]["messages"]
+    assert sorted(msg["recipient"]["nhsNumber"] for msg in messages) == sorted(r[0] for r in recipient_data)
+
+    for msg in messages:
+        assert msg["messageReference"] == message_ids[msg["recipient"]["nhsNumber"]]
@@ -2,6 +2,7 @@ import access_token
 import logging
 import pytest
 import requests_mock
+import threading
 import cryptography.hazmat.primitives.asymmetric.rsa as rsa
 from cryptography.hazmat.primitives import serialization
 
@@ -24,6 +25,13 @@ def setup(monkeypatch):
     monkeypatch.setenv("PRIVATE_KEY", private_key_pem)
 
 
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    access_token.invalidate_token()
+    yield
+    access_token.invalidate_token()
+
+
 def test_get_token_successful_response(setup):
     """Test that a valid response returns the expected access token."""
     with requests_mock.Mocker() as mock:
@@ -51,3 +59,109 @@ def test_get_token_error_response(setup, mocker):
         assert token == ""
         error_logging_spy.assert_any_call("Failed to get access token")
         error_logging_spy.assert_any_call({"error": "an_error"})
+
+
+def test_get_token_is_cached(setup):
+    """Test that a token is reused until it nears expiry."""
+    with requests_mock.Mocker() as mock:
+        adapter = mock.post(
+            "http://tokens.example.com/",
+            json={"access_token": "an_access_token", "expires_in": "599"},
+        )
+
+        assert access_token.get_token() == "an_access_token"
+        assert access_token.get_token() == "an_access_token"
+        assert adapter.call_count == 1
+
+
+def test_get_token_refreshes_near_expiry(setup, monkeypatch):
+    """Test that a token is refreshed once within the refresh margin of its expiry."""
+    now = [1000.0]
+    monkeypatch.setattr(access_token.time, "monotonic", lambda: now[0])
+
+    with requests_mock.Mocker() as mock:
+        adapter = mock.post(
+            "http://tokens.example.com/",
+            [
+                {"json": {"access_token": "first_token", "expires_in": "599"}},
+                {"json": {"access_token": "second_token", "expires_in": "599"}},
+            ],
+        )
+
+        assert access_token.get_token() == "first_token"
+        now[0] += 599 - access_token.REFRESH_MARGIN_SECONDS - 1
+        assert access_token.get_token() == "first_token"
+        now[0] += 1
+        assert access_token.get_token() == "second_token"
+        assert adapter.call_count == 2
+
+
+def test_get_token_error_response_is_not_cached(setup):
+    """Test that a failed token request is retried on the next call."""
+    with requests_mock.Mocker() as mock:
+        adapter = mock.post(
+            "http://tokens.example.com/",
+            [
+                {"status_code": 403, "json": {"error": "an_error"}},
+                {"json": {"access_token": "an_access_token"}},
+            ],
+        )
+
+        assert access_token.get_token() == ""
+        assert access_token.get_token() == "an_access_token"
+        assert adapter.call_count == 2
+
+
+def test_invalidate_token(setup):
+    """Test that invalidating the cached token forces a refresh, but a stale token does not."""
+    with requests_mock.Mocker() as mock:
+        adapter = mock.post(
+            "http://tokens.example.com/",
+            [
+                {"json": {"access_token": "first_token"}},
+                {"json": {"access_token": "second_token"}},
+            ],
+        )
+
+        assert access_token.get_token() == "first_token"
+        access_token.invalidate_token("first_token")
+        assert access_token.get_token() == "second_token"
+        access_token.invalidate_token("first_token")
+        assert access_token.get_token() == "second_token"
+        assert adapter.call_count == 2
+
+
+def test_get_token_concurrent_callers_share_refresh(setup):
+    """Test that concurrent callers share a single token request."""
+    with requests_mock.Mocker() as mock:
+        adapter = mock.post(
+            "http://tokens.example.com/",
+            json={"access_token": "an_access_token"},
+        )
+        tokens = []
+        threads = [threading.Thread(target=lambda: tokens.append(access_token.get_token())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert tokens == ["an_access_token"] * 5
+        assert adapter.call_count == 1
+
+
+def test_request_token_retries_with_a_fresh_client_assertion(setup):
+    """Test that a transient token provider error is retried with a newly signed JWT."""
+    with requests_mock.Mocker() as mock:
+        adapter = mock.post(
+            "http://tokens.example.com/",
+            [
+                {"status_code": 503, "json": {"error": "unavailable"}},
+                {"json": {"access_token": "an_access_token"}},
+            ],
+        )
+
+        assert access_token.get_token() == "an_access_token"
+        assert adapter.call_count == 2
+
+        first, second = [request.text for request in adapter.request_history]
+        assert first != second
@@ -1,9 +1,11 @@
 import batch_processor
 from batch_processor import RecipientsNotFoundError
 from recipient import Recipient
+import oracledb
 import pytest
 import re
-from unittest.mock import MagicMock, patch
+import threading
+from unittest.mock import MagicMock, Mock, patch
 import uuid
 
 
@@ -27,40 +29,66 @@ def recipients():
 
 @patch("batch_processor.oracle_database")
 def test_next_batch(mock_oracle_database, recipients, batch_id, plan_id):
-    mock_oracle_database.get_routing_plan_id.return_value = plan_id
-    mock_oracle_database.get_recipients.return_value = recipients
+    mock_oracle_database.FETCH_PAGE_SIZE = 1000
+    mock_oracle_database.claim_next_batch.return_value = (plan_id, recipients)
     with patch("batch_processor.generate_reference") as mock_generate_reference:
         mock_generate_reference.return_value = batch_id
 
-        result = batch_processor.next_batch()
+        claimed_batch_id, routing_plan_id, streamed = batch_processor.next_batch()
+
+    assert (claimed_batch_id, routing_plan_id, list(streamed)) == (batch_id, plan_id, recipients)
+    mock_oracle_database.claim_next_batch.assert_called_once_with(batch_id)
+    assert mock_oracle_database.get_routing_plan_id.call_count == 0
+    assert mock_oracle_database.get_recipients_page.call_count == 0
+    assert mock_oracle_database.update_message_ids.call_count == 0
+    assert mock_generate_reference.call_count == 1
+
+
+@patch("batch_processor.oracle_database")
+def test_next_batch_streams_the_pages_after_the_first(mock_oracle_database, recipients, batch_id, plan_id):
+    mock_oracle_database.FETCH_PAGE_SIZE = 2
+    later_recipients = [Recipient(("2222222222", "message_reference_2"))]
+    mock_oracle_database.claim_next_batch.return_value = (plan_id, recipients)
+    mock_oracle_database.get_recipients_page.return_value = later_recipients
+    with patch("batch_processor.generate_reference", return_value=batch_id):
+        _, _, streamed = batch_processor.next_batch()
 
-    assert result == (batch_id, plan_id, recipients)
-    assert mock_oracle_database.get_routing_plan_id.call_count == 1
-    assert mock_oracle_database.get_recipients.call_count == 1
-    assert mock_generate_reference.call_count == 3
+    assert next(streamed) is recipients[0]
+    assert next(streamed) is recipients[1]
+    mock_oracle_database.get_recipients_page.assert_not_called()
+    assert list(streamed) == later_recipients
+    mock_oracle_database.get_recipients_page.assert_called_once_with(batch_id, "1111111111")
 
 
 @patch("batch_processor.oracle_database")
 def test_next_batch_no_plan_id(mock_oracle_database, batch_id):
-    mock_oracle_database.get_routing_plan_id.return_value = None
+    mock_oracle_database.claim_next_batch.return_value = (None, [])
     with patch("batch_processor.generate_reference") as mock_generate_reference:
         mock_generate_reference.return_value = batch_id
 
         result = batch_processor.next_batch()
 
     assert result == (batch_id, None, None)
-    assert mock_oracle_database.get_routing_plan_id.call_count == 1
-    assert mock_oracle_database.get_recipients.call_count == 0
+    assert mock_oracle_database.claim_next_batch.call_count == 1
     assert mock_generate_reference.call_count == 1
 
 
+@patch("batch_processor.oracle_database")
+def test_next_batch_database_error(mock_oracle_database):
+    mock_oracle_database.claim_next_batch.side_effect = oracledb.Error("Database error")
+
+    assert batch_processor.next_batch() == (None, None, None)
+
+
 @patch("batch_processor.oracle_database")
 def test_get_recipients(mock_oracle_database, recipients, batch_id):
-    mock_oracle_database.get_recipients.return_value = recipients
-    with patch("batch_processor.generate_message_reference") as mock_generate_message_reference:
-        mock_generate_message_reference.side_effect = ["message_reference_0", "message_reference_1"]
+    mock_oracle_database.FETCH_PAGE_SIZE = 1000
+    mock_oracle_database.get_recipients_page.return_value = recipients
+    mock_oracle_database.update_message_ids.return_value = []
+    with patch("batch_processor.generate_message_references") as mock_generate_message_references:
+        mock_generate_message_references.return_value = ["message_reference_0", "message_reference_1"]
 
-        recipients = batch_processor.get_recipients(batch_id)
+        recipients = list(batch_processor.get_recipients(batch_id))
 
     assert len(recipients) == 2
 
@@ -72,15 +100,70 @@ def test_get_recipients(mock_oracle_database, recipients, batch_id):
     assert recipients[1].message_id == "message_reference_1"
     assert recipients[1].message_status == "requested"
 
+    mock_generate_message_references.assert_called_once_with(2)
+    mock_oracle_database.update_message_ids.assert_called_once_with(batch_id, recipients)
+    mock_oracle_database.release_recipients.assert_not_called()
+
+
+@patch("batch_processor.oracle_database")
+def test_get_recipients_excludes_failed_updates(mock_oracle_database, recipients, batch_id):
+    mock_oracle_database.FETCH_PAGE_SIZE = 1000
+    mock_oracle_database.get_recipients_page.return_value = recipients
+    mock_oracle_database.update_message_ids.return_value = [Mock(offset=0, message="ORA-00001")]
+
+    result = list(batch_processor.get_recipients(batch_id))
+
+    assert result == [recipients[1]]
+    mock_oracle_database.release_recipients.assert_called_once_with(batch_id, [recipients[0]])
+
+
+@patch("batch_processor.oracle_database")
+def test_get_recipients_keeps_existing_message_ids(mock_oracle_database, batch_id):
+    recipients = [
+        Recipient(("0000000000", "message_reference_0", None, None, "requested")),
+        Recipient(("1111111111", None, None, None, "requested")),
+    ]
+    mock_oracle_database.FETCH_PAGE_SIZE = 1000
+    mock_oracle_database.get_recipients_page.return_value = recipients
+    mock_oracle_database.update_message_ids.return_value = []
+
+    result = list(batch_processor.get_recipients(batch_id))
+
+    assert result == recipients
+    assert result[0].message_id == "message_reference_0"
+    assert result[1].message_id is not None
+    mock_oracle_database.update_message_ids.assert_called_once_with(batch_id, [recipients[1]])
+
+
+@patch("batch_processor.oracle_database")
+def test_get_recipients_redelivered_batch_is_not_reassigned(mock_oracle_database, batch_id):
+    recipients = [Recipient(("0000000000", "message_reference_0", None, None, "requested"))]
+    mock_oracle_database.FETCH_PAGE_SIZE = 1000
+    mock_oracle_database.get_recipients_page.return_value = recipients
+
+    assert list(batch_processor.get_recipients(batch_id)) == recipients
+    mock_oracle_database.update_message_ids.assert_not_called()
+
+
+@patch("batch_processor.oracle_database")
+def test_get_recipients_database_error(mock_oracle_database, batch_id):
+    mock_oracle_database.get_recipients_page.side_effect = oracledb.Error("Database error")
+
+    with pytest.raises(oracledb.Error):
+        batch_processor.get_recipients(batch_id)
+
+    mock_oracle_database.update_message_ids.assert_not_called()
+
 
 @patch("batch_processor.oracle_database")
 def test_null_recipients(mock_oracle_database, batch_id):
-    mock_fetch_recipients = mock_oracle_database.get_recipients
+    mock_fetch_recipients = mock_oracle_database.get_recipients_page
     mock_fetch_recipients.return_value = []
 
     assert batch_processor.get_recipients(batch_id) == []
 
     assert mock_fetch_recipients.call_count == 1
+    assert mock_oracle_database.update_message_ids.call_count == 0
 
 
 @patch("batch_processor.oracle_database")
@@ -105,19 +188,59 @@ def test_null_routing_plan_id(mock_oracle_database, batch_id):
 
 
 @patch("batch_processor.oracle_database")
-def test_mark_batch_as_sent(mock_oracle_database, batch_id):
-    mock_mark_batch_as_sent = mock_oracle_database.mark_batch_as_sent
-
-    batch_processor.mark_batch_as_sent(batch_id)
+def test_mark_chunk_as_sent(mock_oracle_database, recipients, batch_id):
+    batch_processor.mark_chunk_as_sent(batch_id, recipients)
 
-    mock_mark_batch_as_sent.assert_called_once_with(batch_id)
+    mock_oracle_database.mark_recipients_as_sent.assert_called_once_with(batch_id, recipients)
 
 
-def test_generate_message_reference():
-    message_reference = batch_processor.generate_message_reference()
+def test_generate_batch_id():
+    batch_id = batch_processor.generate_batch_id()
 
-    assert isinstance(message_reference, str)
-    assert len(message_reference) == 36
-    assert re.match(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", message_reference)
+    assert isinstance(batch_id, str)
+    assert len(batch_id) == 36
+    assert re.match(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", batch_id)
     for _ in range(100):
-        assert message_reference != batch_processor.generate_message_reference()
+        assert batch_id != batch_processor.generate_batch_id()
+
+
+def test_generate_chunk_reference(batch_id):
+    chunk_reference = batch_processor.generate_chunk_reference(batch_id, "message_reference_1")
+
+    assert re.match(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", chunk_reference)
+    assert chunk_reference == batch_processor.generate_chunk_reference(batch_id, "message_reference_1")
+    assert chunk_reference != batch_processor.generate_chunk_reference(batch_id, "message_reference_2")
+
+
+def test_generate_message_references():
+    message_references = batch_processor.generate_message_references(3)
+
+    assert len(message_references) == 3
+    for message_reference in message_references:
+        parsed = uuid.UUID(message_reference)
+        assert str(parsed) == message_reference
+        assert parsed.version == 4
+        assert parsed.variant == uuid.RFC_4122
+
+
+def test_generate_references_are_unique_across_calls():
+    references = set(batch_processor.generate_references(50_000))
+    references.update(batch_processor.generate_reference() for _ in range(1_000))
+    references.update(batch_processor.generate_references(50_000))
+
+    assert len(references) == 101_000
+
+
+def test_generate_references_are_unique_across_threads():
+    results = []
+
+    def generate():
+        results.append(batch_processor.generate_references(50_000))
+
+    threads = [threading.Thread(target=generate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({reference for block in results for reference in block}) == 400_000
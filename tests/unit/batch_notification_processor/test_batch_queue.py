@@ -0,0 +1,64 @@
+import json
+from unittest.mock import Mock
+import batch_queue
+
+
+def test_enabled(monkeypatch):
+    monkeypatch.delenv("BATCH_QUEUE_URL", raising=False)
+    assert batch_queue.enabled() is False
+
+    monkeypatch.setenv("BATCH_QUEUE_URL", "https://sqs.example/batch-queue")
+    assert batch_queue.enabled() is True
+
+
+def test_enqueue(monkeypatch):
+    monkeypatch.setenv("BATCH_QUEUE_URL", "https://sqs.example/batch-queue")
+    mock_client = Mock()
+    monkeypatch.setattr(batch_queue, "client", lambda: mock_client)
+
+    batch_queue.enqueue("batch_id", "routing_plan_id")
+
+    mock_client.send_message.assert_called_once_with(
+        QueueUrl="https://sqs.example/batch-queue",
+        MessageBody=json.dumps({"batch_id": "batch_id", "routing_plan_id": "routing_plan_id"}),
+    )
+
+
+def test_queued_batches():
+    records = [
+        {"messageId": "1", "body": '{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}'},
+        {"messageId": "2", "body": "not json"},
+        {"messageId": "3", "body": '{"batch_id": "batch_id_3"}'},
+        {
+            "messageId": "4",
+            "body": '{"batch_id": "batch_id_4", "routing_plan_id": "plan_4"}',
+            "attributes": {"ApproximateReceiveCount": "3"},
+        },
+    ]
+
+    assert batch_queue.queued_batches(records) == [
+        ("1", "batch_id_1", "plan_1", 1),
+        ("2", None, None, 1),
+        ("3", None, None, 1),
+        ("4", "batch_id_4", "plan_4", 3),
+    ]
+
+
+def test_max_receive_count(monkeypatch):
+    assert batch_queue.max_receive_count() == batch_queue.MAX_RECEIVE_COUNT
+
+    monkeypatch.setenv("BATCH_QUEUE_MAX_RECEIVE_COUNT", "3")
+    assert batch_queue.max_receive_count() == 3
+
+
+def test_local_batch_queue_delivers_messages_as_sqs_events():
+    local_queue = batch_queue.LocalBatchQueue()
+
+    for idx in range(3):
+        local_queue.send_message(QueueUrl="batch-queue", MessageBody=f'{{"batch_id": "batch_id_{idx}"}}')
+
+    first, second = local_queue.event(batch_size=2), local_queue.event(batch_size=2)
+
+    assert [r["messageId"] for r in first["Records"]] == ["1", "2"]
+    assert [r["messageId"] for r in second["Records"]] == ["3"]
+    assert local_queue.event() == {"Records": []}
@@ -1,9 +1,11 @@
 import access_token
-from communication_management import CommunicationManagement
+import json_codec
+from communication_management import CommunicationManagement, REQUEST_ENVELOPE_BYTES
+import json
 from recipient import Recipient
 import pytest
 import requests_mock
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 
 class TestCommunicationManagement:
@@ -57,38 +59,140 @@ class TestCommunicationManagement:
                 },
             }
 
-    def test_generate_batch_message_request_body(self, setup):
-        recipients = [
-            Recipient(("0000000000", "message_reference_0", "requested")),
-            Recipient(("1111111111", "message_reference_1", "requested")),
-        ]
-
+    def test_send_batch_message_refreshes_token_on_401(self, setup):
         subject = CommunicationManagement()
+        access_token.get_token = Mock(side_effect=["expired_token", "fresh_token"])
 
-        message_batch = subject.generate_batch_message_request_body("routing_config_id", "batch_reference", recipients)
+        with requests_mock.Mocker() as rm, patch("access_token.invalidate_token") as mock_invalidate_token:
+            adapter = rm.post(
+                "http://example.com/message/batch",
+                [{"status_code": 401}, {"status_code": 201}],
+            )
+
+            response = subject.send_batch_message(
+                "batch_id",
+                "routing_config_id",
+                [Recipient(("0000000000", "message_reference_0", "requested"))]
+            )
+
+            assert response.status_code == 201
+            assert adapter.call_count == 2
+            mock_invalidate_token.assert_called_once_with("expired_token")
+            assert adapter.request_history[0].headers["authorization"] == "Bearer expired_token"
+            assert adapter.request_history[1].headers["authorization"] == "Bearer fresh_token"
+            assert (
+                adapter.request_history[0].headers["x-correlation-id"] ==
+                adapter.request_history[1].headers["x-correlation-id"]
+            )
 
-        assert message_batch["data"]["attributes"]["routingPlanId"] == "routing_config_id"
-        assert message_batch["data"]["attributes"]["messageBatchReference"] == "batch_reference"
-        assert len(message_batch["data"]["attributes"]["messages"]) == 2
-        assert message_batch["data"]["attributes"]["messages"][0]["recipient"]["nhsNumber"] == "0000000000"
-        assert message_batch["data"]["attributes"]["messages"][0]["messageReference"] == "message_reference_0"
-        assert message_batch["data"]["attributes"]["messages"][1]["recipient"]["nhsNumber"] == "1111111111"
-        assert message_batch["data"]["attributes"]["messages"][1]["messageReference"] == "message_reference_1"
+    def test_chunk_recipients_fits_in_one_request(self, setup):
+        recipients = [Recipient((f"000000000{i}", f"message_reference_{i}")) for i in range(3)]
 
-    def test_generate_message(self, setup):
-        recipient = Recipient(("0000000000", "message_reference_0", "requested"))
+        chunks = list(CommunicationManagement().chunk_recipients(recipients))
 
+        assert chunks == [recipients]
+
+    def test_chunk_recipients_by_message_count(self, setup, monkeypatch):
+        monkeypatch.setenv("MAX_MESSAGES_PER_REQUEST", "2")
+        recipients = [Recipient((f"000000000{i}", f"message_reference_{i}")) for i in range(5)]
+
+        chunks = list(CommunicationManagement().chunk_recipients(recipients))
+
+        assert chunks == [recipients[0:2], recipients[2:4], recipients[4:]]
+
+    def test_chunk_recipients_by_request_bytes(self, setup, monkeypatch):
+        subject = CommunicationManagement()
+        recipients = [Recipient((f"000000000{i}", f"message_reference_{i}")) for i in range(4)]
+        message_bytes = len(subject.encode_message(recipients[0]).encode("utf-8")) + 1
+        monkeypatch.setenv("MAX_REQUEST_BYTES", str(REQUEST_ENVELOPE_BYTES + message_bytes * 3))
+
+        chunks = list(subject.chunk_recipients(recipients))
+
+        assert chunks == [recipients[0:3], recipients[3:]]
+        for chunk in chunks:
+            request_body = subject.encode_batch_message_request_body("routing_config_id", "batch_reference", chunk)
+            assert len(request_body) <= REQUEST_ENVELOPE_BYTES + message_bytes * 3
+
+    def test_chunk_recipients_encodes_each_message_once(self, setup):
         subject = CommunicationManagement()
+        recipients = [Recipient((f"000000000{i}", f"message_reference_{i}")) for i in range(3)]
+
+        with patch.object(subject, "encode_message", wraps=subject.encode_message) as mock_encode_message:
+            chunks = list(subject.chunk_recipients(recipients))
+            request_body = subject.encode_batch_message_request_body("routing_config_id", "batch_reference", chunks[0])
 
-        message = subject.generate_message(recipient)
+        assert mock_encode_message.call_count == 3
+        assert request_body == subject.encode_batch_message_request_body(
+            "routing_config_id", "batch_reference", list(recipients)
+        )
 
-        assert message["messageReference"] == "message_reference_0"
-        assert message["recipient"]["nhsNumber"] == "0000000000"
-        assert message["personalisation"] == {}
+    def test_chunk_recipients_no_recipients(self, setup):
+        assert not list(CommunicationManagement().chunk_recipients([]))
 
     def test_generate_hmac_signature(self, setup):
         subject = CommunicationManagement()
 
-        hmac_signature = subject.generate_hmac_signature({"data": "data"})
+        hmac_signature = subject.generate_hmac_signature(b'{"data":"data"}')
+
+        assert hmac_signature == "fe43d44b0281ed2d35673e023bf5600ca38731824c6b24f2264be8090213d28d"
+
+    def test_encode_batch_message_request_body(self, setup):
+        subject = CommunicationManagement()
+        recipients = [
+            Recipient(("0000000000", "message_reference_0", "requested")),
+            Recipient(("1111111111", None, "requested")),
+            Recipient(("2222222222", 'reference "with" quotes', "requested")),
+        ]
+
+        encoded = subject.encode_batch_message_request_body("routing_config_id", "batch_id", recipients)
+
+        assert encoded == json_codec.dumps({
+            "data": {
+                "type": "MessageBatch",
+                "attributes": {
+                    "routingPlanId": "routing_config_id",
+                    "messageBatchReference": "batch_id",
+                    "messages": [
+                        {"messageReference": r.message_id, "recipient": {"nhsNumber": r.nhs_number}, "personalisation": {}}
+                        for r in recipients
+                    ],
+                },
+            }
+        })
+
+    def test_send_batch_message_retries_with_the_same_request(self, setup):
+        subject = CommunicationManagement()
+
+        with requests_mock.Mocker() as rm:
+            adapter = rm.post(
+                "http://example.com/message/batch",
+                [
+                    {"status_code": 429, "headers": {"Retry-After": "1"}},
+                    {"status_code": 503},
+                    {"status_code": 201, "json": {"data": {"id": "batch_id"}}},
+                ],
+            )
+
+            response = subject.send_batch_message(
+                "batch_id", "routing_config_id", [Recipient(("0000000000", "message_reference_0", "requested"))]
+            )
+
+            assert response.status_code == 201
+            assert adapter.call_count == 3
+            assert len({r.headers["x-correlation-id"] for r in adapter.request_history}) == 1
+            assert len({r.body for r in adapter.request_history}) == 1
+            assert json.loads(adapter.last_request.body)["data"]["attributes"]["messageBatchReference"] == "batch_id"
+
+    def test_send_batch_message_signs_the_bytes_it_sends(self, setup):
+        subject = CommunicationManagement()
+
+        with requests_mock.Mocker() as rm:
+            adapter = rm.post("http://example.com/message/batch", status_code=201, json={"data": {"id": "batch_id"}})
+
+            subject.send_batch_message(
+                "batch_id", "routing_config_id", [Recipient(("0000000000", "message_reference_0", "requested"))]
+            )
 
-        assert hmac_signature == "e2a0ce7f9e78746d86cbdb5ebcc9bae6eb25bfed844498d3f818ae5f975ef40f"
+            sent = adapter.last_request.body
+            assert sent == json_codec.dumps(json.loads(sent))
+            assert adapter.last_request.headers["x-hmac-sha256-signature"] == subject.generate_hmac_signature(sent)
@@ -1,5 +1,10 @@
+import json
+import threading
 from unittest.mock import Mock, patch
+import batch_queue
+import circuit_breaker
 import lambda_function
+from communication_management import CommunicationManagement
 from recipient import Recipient
 
 
@@ -7,6 +12,7 @@ def test_lambda_handler():
     mock_batch_processor = Mock()
     lambda_function.batch_processor = mock_batch_processor
     mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
     lambda_function.CommunicationManagement = mock_communication_management
 
     recipients = [
@@ -37,4 +43,499 @@ def test_lambda_handler():
         routing_plan_id_1,
         recipients
     )
-    mock_batch_processor.mark_batch_as_sent.assert_called_once_with(batch_id_1)
+    mock_batch_processor.mark_chunk_as_sent.assert_called_once_with(batch_id_1, recipients)
+
+
+def test_lambda_handler_concurrent_batches(monkeypatch):
+    monkeypatch.setenv("MAX_CONCURRENT_BATCHES", "2")
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    batch_ids = ["batch_id_1", "batch_id_2", "batch_id_3"]
+
+    mock_batch_processor.next_batch = Mock(side_effect=[
+        *[(batch_id, "routing_plan_id", recipients) for batch_id in batch_ids],
+        ("batch_id_4", None, None),
+    ])
+
+    def send_batch_message(batch_id, _routing_plan_id, _recipients):
+        return Mock(status_code=500 if batch_id == "batch_id_2" else 201, text="")
+
+    mock_communication_management.return_value.send_batch_message = Mock(side_effect=send_batch_message)
+
+    response = lambda_function.lambda_handler({}, {})
+
+    assert mock_batch_processor.next_batch.call_count == 4
+    assert mock_communication_management.return_value.send_batch_message.call_count == 3
+    assert sorted(c.args[0] for c in mock_batch_processor.mark_chunk_as_sent.call_args_list) == ["batch_id_1", "batch_id_3"]
+    assert "batch_id_2" not in response["message"]
+
+
+def test_lambda_handler_send_error_does_not_stop_processing(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    mock_batch_processor.next_batch = Mock(side_effect=[
+        ("batch_id_1", "routing_plan_id", recipients),
+        ("batch_id_2", "routing_plan_id", recipients),
+        ("batch_id_3", None, None),
+    ])
+    mock_communication_management.return_value.send_batch_message = Mock(
+        side_effect=[Exception("Connection reset"), Mock(status_code=201)]
+    )
+
+    response = lambda_function.lambda_handler({}, {})
+
+    mock_batch_processor.mark_chunk_as_sent.assert_called_once_with("batch_id_2", recipients)
+    assert response["message"] == "Processed batches: ['batch_id_2']"
+
+
+def test_lambda_handler_chunked_batch(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient((f"000000000{i}", f"message_reference_{i}", "new")) for i in range(3)]
+    chunks = [recipients[:2], recipients[2:]]
+    mock_batch_processor.next_batch = Mock(side_effect=[
+        ("batch_id_1", "routing_plan_id", recipients),
+        ("batch_id_2", None, None),
+    ])
+    mock_batch_processor.generate_chunk_reference = Mock(return_value="chunk_reference_1")
+    mock_communication_management.return_value.chunk_recipients = Mock(return_value=iter(chunks))
+    mock_communication_management.return_value.send_batch_message = Mock(
+        side_effect=[Mock(status_code=201), Mock(status_code=500, text="")]
+    )
+
+    response = lambda_function.lambda_handler({}, {})
+
+    mock_batch_processor.generate_chunk_reference.assert_called_once_with("batch_id_1", "message_reference_2")
+    send_batch_message = mock_communication_management.return_value.send_batch_message
+    send_batch_message.assert_any_call("batch_id_1", "routing_plan_id", chunks[0])
+    send_batch_message.assert_any_call("chunk_reference_1", "routing_plan_id", chunks[1])
+    mock_batch_processor.mark_chunk_as_sent.assert_called_once_with("batch_id_1", chunks[0])
+    assert response["message"] == "Processed batches: ['batch_id_1']"
+
+
+def test_send_batch_sends_each_chunk_as_it_fills(monkeypatch):
+    monkeypatch.setenv("MAX_MESSAGES_PER_REQUEST", "1")
+    mock_batch_processor = Mock()
+    mock_batch_processor.generate_chunk_reference = Mock(side_effect=lambda batch_id, message_id: f"{batch_id}_{message_id}")
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    communication_management = CommunicationManagement()
+    events = []
+
+    def recipients():
+        for i in range(3):
+            events.append(f"read {i}")
+            yield Recipient((f"000000000{i}", f"message_reference_{i}"))
+
+    def send_batch_message(chunk_reference, _routing_plan_id, _chunk):
+        events.append(f"sent {chunk_reference}")
+        return Mock(status_code=201)
+
+    communication_management.send_batch_message = Mock(side_effect=send_batch_message)
+
+    sent = lambda_function.send_batch(communication_management, "batch_id", "routing_plan_id", recipients())
+
+    assert sent == (["batch_id", "batch_id_message_reference_1", "batch_id_message_reference_2"], True)
+    assert events == [
+        "read 0",
+        "read 1",
+        "sent batch_id",
+        "read 2",
+        "sent batch_id_message_reference_1",
+        "sent batch_id_message_reference_2",
+    ]
+    assert mock_batch_processor.mark_chunk_as_sent.call_count == 3
+
+
+def test_lambda_handler_claims_next_batch_while_sending(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    second_batch_claimed = threading.Event()
+
+    def next_batch():
+        if mock_batch_processor.next_batch.call_count == 1:
+            return "batch_id_1", "routing_plan_id", recipients
+        second_batch_claimed.set()
+        return "batch_id_2", None, None
+
+    def send_batch_message(_batch_id, _routing_plan_id, _recipients):
+        assert second_batch_claimed.wait(timeout=5), "next batch was not claimed while the send was in flight"
+        return Mock(status_code=201)
+
+    mock_batch_processor.next_batch = Mock(side_effect=next_batch)
+    mock_communication_management.return_value.send_batch_message = Mock(side_effect=send_batch_message)
+
+    response = lambda_function.lambda_handler({}, {})
+
+    assert response["message"] == "Processed batches: ['batch_id_1']"
+
+
+def test_lambda_handler_stops_claiming_near_deadline(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", Mock())
+    context = Mock(get_remaining_time_in_millis=Mock(return_value=20000))
+
+    response = lambda_function.lambda_handler({}, context)
+
+    mock_batch_processor.next_batch.assert_not_called()
+    assert response["message"] == "Processed batches: []"
+    assert response["continuation"] is True
+
+
+def test_lambda_handler_stops_claiming_when_next_batch_would_overrun(monkeypatch):
+    monkeypatch.setenv("BATCH_ESTIMATE_SECONDS", "1")
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    remaining_millis = [60000]
+    context = Mock(get_remaining_time_in_millis=Mock(side_effect=lambda: remaining_millis[0]))
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    batches = iter([("batch_id_1", "routing_plan_id", recipients), ("batch_id_2", "routing_plan_id", recipients)])
+
+    def next_batch():
+        remaining_millis[0] -= 25000
+        return next(batches)
+
+    mock_batch_processor.next_batch = Mock(side_effect=next_batch)
+    mock_communication_management.return_value.send_batch_message = Mock(return_value=Mock(status_code=201))
+
+    response = lambda_function.lambda_handler({}, context)
+
+    assert mock_batch_processor.next_batch.call_count == 2
+    assert mock_batch_processor.mark_chunk_as_sent.call_count == 2
+    assert response["continuation"] is True
+
+
+def test_lambda_handler_no_continuation_when_batches_run_out(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", Mock())
+    mock_batch_processor.next_batch = Mock(return_value=("batch_id_1", None, None))
+    context = Mock(get_remaining_time_in_millis=Mock(return_value=300000))
+
+    response = lambda_function.lambda_handler({}, context)
+
+    assert response["continuation"] is False
+
+
+def test_lambda_handler_claim_error_shuts_down_cleanly(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    mock_batch_processor.next_batch = Mock(side_effect=[
+        ("batch_id_1", "routing_plan_id", recipients),
+        Exception("Database unavailable"),
+    ])
+    mock_communication_management.return_value.send_batch_message = Mock(return_value=Mock(status_code=201))
+
+    response = lambda_function.lambda_handler({}, {})
+
+    mock_batch_processor.mark_chunk_as_sent.assert_called_once_with("batch_id_1", recipients)
+    assert response["message"] == "Processed batches: ['batch_id_1']"
+
+
+def test_lambda_handler_fans_out_batches_to_queue(monkeypatch):
+    monkeypatch.setenv("BATCH_QUEUE_URL", "https://sqs.example/batch-queue")
+    local_queue = batch_queue.LocalBatchQueue()
+    monkeypatch.setattr(batch_queue, "client", lambda: local_queue)
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    mock_batch_processor.generate_batch_id = Mock(side_effect=["batch_id_1", "batch_id_2", "batch_id_3"])
+    mock_batch_processor.get_routing_plan_id = Mock(side_effect=["routing_plan_id", "routing_plan_id", None])
+
+    response = lambda_function.lambda_handler({}, {})
+
+    assert response["message"] == "Enqueued batches: ['batch_id_1', 'batch_id_2']"
+    assert response["continuation"] is False
+    assert [json.loads(m["body"]) for m in local_queue.messages] == [
+        {"batch_id": "batch_id_1", "routing_plan_id": "routing_plan_id"},
+        {"batch_id": "batch_id_2", "routing_plan_id": "routing_plan_id"},
+    ]
+    mock_batch_processor.next_batch.assert_not_called()
+    mock_communication_management.return_value.send_batch_message.assert_not_called()
+
+
+def test_lambda_handler_releases_batch_that_cannot_be_enqueued(monkeypatch):
+    monkeypatch.setenv("BATCH_QUEUE_URL", "https://sqs.example/batch-queue")
+    local_queue = batch_queue.LocalBatchQueue()
+    local_queue.send_message = Mock(side_effect=[{"MessageId": "1"}, Exception("SQS unavailable")])
+    monkeypatch.setattr(batch_queue, "client", lambda: local_queue)
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+
+    mock_batch_processor.generate_batch_id = Mock(side_effect=["batch_id_1", "batch_id_2", "batch_id_3"])
+    mock_batch_processor.get_routing_plan_id = Mock(return_value="routing_plan_id")
+
+    response = lambda_function.lambda_handler({}, {})
+
+    assert response["message"] == "Enqueued batches: ['batch_id_1']"
+    mock_batch_processor.release_batch.assert_called_once_with("batch_id_2")
+    assert mock_batch_processor.get_routing_plan_id.call_count == 2
+
+
+def test_lambda_handler_processes_batches_named_in_sqs_event(monkeypatch):
+    monkeypatch.setenv("BATCH_QUEUE_URL", "https://sqs.example/batch-queue")
+    local_queue = batch_queue.LocalBatchQueue()
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}')
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_2", "routing_plan_id": "plan_2"}')
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    mock_batch_processor.get_recipients = Mock(return_value=recipients)
+    mock_communication_management.return_value.send_batch_message = Mock(return_value=Mock(status_code=201))
+
+    response = lambda_function.lambda_handler(local_queue.event(), {})
+
+    mock_batch_processor.next_batch.assert_not_called()
+    mock_batch_processor.generate_batch_id.assert_not_called()
+    assert mock_batch_processor.get_recipients.call_args_list == [(("batch_id_1",),), (("batch_id_2",),)]
+    mock_communication_management.return_value.send_batch_message.assert_any_call("batch_id_1", "plan_1", recipients)
+    mock_communication_management.return_value.send_batch_message.assert_any_call("batch_id_2", "plan_2", recipients)
+    assert response["message"] == "Processed batches: ['batch_id_1', 'batch_id_2']"
+    assert response["batchItemFailures"] == []
+
+
+def test_lambda_handler_reports_unsent_queued_batches_as_failures(monkeypatch):
+    local_queue = batch_queue.LocalBatchQueue()
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}')
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_2", "routing_plan_id": "plan_2"}')
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody="not json")
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    mock_batch_processor.get_recipients = Mock(return_value=recipients)
+    mock_communication_management.return_value.send_batch_message = Mock(
+        side_effect=lambda batch_id, *_: Mock(status_code=201 if batch_id == "batch_id_1" else 500)
+    )
+
+    response = lambda_function.lambda_handler(local_queue.event(), {})
+
+    assert response["message"] == "Processed batches: ['batch_id_1']"
+    assert response["batchItemFailures"] == [{"itemIdentifier": "2"}]
+
+
+def test_lambda_handler_reports_partly_sent_queued_batch_as_failure(monkeypatch):
+    local_queue = batch_queue.LocalBatchQueue()
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}')
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient((f"000000000{i}", f"message_reference_{i}")) for i in range(2)]
+    mock_batch_processor.get_recipients = Mock(return_value=recipients)
+    mock_batch_processor.generate_chunk_reference = Mock(return_value="chunk_reference_1")
+    mock_communication_management.return_value.chunk_recipients = Mock(return_value=iter([recipients[:1], recipients[1:]]))
+    mock_communication_management.return_value.send_batch_message = Mock(
+        side_effect=[Mock(status_code=201), Mock(status_code=500, text="")]
+    )
+
+    response = lambda_function.lambda_handler(local_queue.event(), {})
+
+    assert response["message"] == "Processed batches: ['batch_id_1']"
+    assert response["batchItemFailures"] == [{"itemIdentifier": "1"}]
+    mock_batch_processor.release_batch.assert_not_called()
+
+
+def test_lambda_handler_sends_redelivered_batch_under_chunk_references(monkeypatch):
+    event = {
+        "Records": [
+            {
+                "messageId": "1",
+                "body": '{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}',
+                "attributes": {"ApproximateReceiveCount": "2"},
+            }
+        ]
+    }
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_1"))]
+    mock_batch_processor.get_recipients = Mock(return_value=recipients)
+    mock_batch_processor.generate_chunk_reference = Mock(return_value="chunk_reference_1")
+    mock_communication_management.return_value.send_batch_message = Mock(return_value=Mock(status_code=201))
+
+    response = lambda_function.lambda_handler(event, {})
+
+    mock_batch_processor.generate_chunk_reference.assert_called_once_with("batch_id_1", "message_reference_1")
+    mock_communication_management.return_value.send_batch_message.assert_called_once_with(
+        "chunk_reference_1", "plan_1", recipients
+    )
+    mock_batch_processor.mark_chunk_as_sent.assert_called_once_with("chunk_reference_1", recipients)
+    assert response["batchItemFailures"] == []
+
+
+def test_lambda_handler_releases_unsent_batch_on_its_final_receive(monkeypatch):
+    event = {
+        "Records": [
+            {
+                "messageId": str(idx),
+                "body": f'{{"batch_id": "batch_id_{idx}", "routing_plan_id": "plan_1"}}',
+                "attributes": {"ApproximateReceiveCount": str(receive_count)},
+            }
+            for idx, receive_count in ((1, 4), (2, 5))
+        ]
+    }
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", Mock())
+    mock_batch_processor.get_recipients = Mock(side_effect=Exception("Database unavailable"))
+
+    response = lambda_function.lambda_handler(event, {})
+
+    mock_batch_processor.release_batch.assert_called_once_with("batch_id_2")
+    assert response["batchItemFailures"] == [{"itemIdentifier": "1"}]
+
+
+def test_lambda_handler_reports_final_receive_as_failure_when_release_fails(monkeypatch):
+    event = {
+        "Records": [
+            {
+                "messageId": "1",
+                "body": '{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}',
+                "attributes": {"ApproximateReceiveCount": "5"},
+            }
+        ]
+    }
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", Mock())
+    mock_batch_processor.get_recipients = Mock(side_effect=Exception("Database unavailable"))
+    mock_batch_processor.release_batch = Mock(side_effect=Exception("Database unavailable"))
+
+    response = lambda_function.lambda_handler(event, {})
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "1"}]
+
+
+def test_lambda_handler_acknowledges_queued_batches_with_nothing_to_send(monkeypatch):
+    local_queue = batch_queue.LocalBatchQueue()
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}')
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_2", "routing_plan_id": "plan_2"}')
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    mock_batch_processor.get_recipients = Mock(side_effect=[[], recipients])
+    mock_communication_management.return_value.send_batch_message = Mock(return_value=Mock(status_code=201))
+
+    response = lambda_function.lambda_handler(local_queue.event(), {})
+
+    mock_communication_management.return_value.send_batch_message.assert_called_once_with("batch_id_2", "plan_2", recipients)
+    assert response["message"] == "Processed batches: ['batch_id_2']"
+    assert response["batchItemFailures"] == []
+
+
+def test_lambda_handler_retries_queued_batches_when_recipients_cannot_be_fetched(monkeypatch):
+    local_queue = batch_queue.LocalBatchQueue()
+    local_queue.send_message(QueueUrl="batch-queue", MessageBody='{"batch_id": "batch_id_1", "routing_plan_id": "plan_1"}')
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", Mock())
+    mock_batch_processor.get_recipients = Mock(side_effect=Exception("Database unavailable"))
+
+    response = lambda_function.lambda_handler(local_queue.event(), {})
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "1"}]
+
+
+def test_lambda_handler_stops_claiming_once_notify_circuit_opens(monkeypatch):
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "2")
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    mock_communication_management = Mock()
+    mock_communication_management.return_value.chunk_recipients = Mock(side_effect=lambda r: [r])
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", mock_communication_management)
+
+    recipients = [Recipient(("1234567890", "message_reference_0", "new"))]
+    batch_numbers = iter(range(1, 100))
+    mock_batch_processor.next_batch = Mock(side_effect=lambda: (f"batch_id_{next(batch_numbers)}", "routing_plan_id", recipients))
+    mock_communication_management.return_value.send_batch_message = Mock(
+        side_effect=lambda *_: circuit_breaker.notify(lambda: Mock(status_code=503, text="Service Unavailable"))
+    )
+
+    response = lambda_function.lambda_handler({}, {})
+
+    assert response["message"] == "Processed batches: []"
+    assert response["circuit_breakers"]["notify"] == {"state": "open", "failures": 2}
+    # The two failed sends, plus at most the batch prefetched and the one claimed while the second was sent.
+    claimed = mock_batch_processor.next_batch.call_count
+    assert claimed <= 4
+    assert mock_communication_management.return_value.send_batch_message.call_count == claimed
+    assert [c.args for c in mock_batch_processor.release_batch.call_args_list] == [
+        (f"batch_id_{n}",) for n in range(3, claimed + 1)
+    ]
+    mock_batch_processor.mark_chunk_as_sent.assert_not_called()
+
+
+def test_send_batch_releases_batch_refused_by_open_circuit(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    communication_management = Mock()
+    communication_management.chunk_recipients = Mock(side_effect=lambda r: [r])
+    communication_management.send_batch_message = Mock(side_effect=circuit_breaker.CircuitOpenError("open"))
+    recipients = [Recipient(("1234567890", "message_reference_0"))]
+
+    sent = lambda_function.send_batch(communication_management, "batch_id_1", "routing_plan_id", recipients)
+
+    assert sent == ([], True)
+    mock_batch_processor.release_batch.assert_called_once_with("batch_id_1")
+    mock_batch_processor.mark_chunk_as_sent.assert_not_called()
+
+
+def test_lambda_handler_does_not_claim_while_notify_circuit_is_open(monkeypatch):
+    mock_batch_processor = Mock()
+    monkeypatch.setattr(lambda_function, "batch_processor", mock_batch_processor)
+    monkeypatch.setattr(lambda_function, "CommunicationManagement", Mock())
+    notify = circuit_breaker.circuit("notify")
+
+    for _ in range(notify.failure_threshold):
+        notify.record(False)
+
+    response = lambda_function.lambda_handler({}, {})
+
+    mock_batch_processor.next_batch.assert_not_called()
+    assert response["message"] == "Processed batches: []"
+    assert response["circuit_breakers"]["notify"]["state"] == "open"
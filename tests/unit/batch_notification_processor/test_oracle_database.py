@@ -35,69 +35,255 @@ def test_get_routing_plan_id(mock_database):
     assert routing_plan_id == expected_routing_plan_id
 
 
+def mock_fetchall(mock_cursor, rows):
+    return Mock(side_effect=lambda: [mock_cursor.rowfactory(*row) for row in rows])
+
+
+@patch("oracle_database.database", autospec=True)
+def test_claim_next_batch(mock_database):
+    mock_cursor = mock_database.cursor().__enter__()
+    mock_recipients_cursor = mock_cursor.connection.cursor()
+    mock_routing_plan_id = Mock(getvalue=Mock(return_value="routing_plan_id"))
+    mock_cursor.var = Mock(return_value=mock_routing_plan_id)
+    mock_recipients_cursor.description = [("NHS_NUMBER",), ("MESSAGE_ID",)]
+    mock_recipients_cursor.fetchall = mock_fetchall(
+        mock_recipients_cursor, [("1111111111", "message_reference_1"), ("2222222222", "message_reference_2")]
+    )
+
+    routing_plan_id, recipients = oracle_database.claim_next_batch("1234")
+
+    mock_cursor.var.assert_called_once_with(oracledb.STRING)
+    mock_cursor.execute.assert_called_once_with(
+        oracle_database.claim_next_batch_block(),
+        {
+            "batch_id": "1234",
+            "message_status": "requested",
+            "page_size": oracle_database.FETCH_PAGE_SIZE,
+            "routing_plan_id": mock_routing_plan_id,
+            "recipients": mock_recipients_cursor,
+        },
+    )
+    assert mock_recipients_cursor.prefetchrows == oracle_database.FETCH_PAGE_SIZE + 1
+    assert routing_plan_id == "routing_plan_id"
+    assert [(r.nhs_number, r.message_id) for r in recipients] == [
+        ("1111111111", "message_reference_1"),
+        ("2222222222", "message_reference_2"),
+    ]
+    mock_recipients_cursor.close.assert_called_once()
+
+
+@patch("oracle_database.database", autospec=True)
+def test_claim_next_batch_nothing_to_claim(mock_database):
+    mock_cursor = mock_database.cursor().__enter__()
+    mock_cursor.var = Mock(return_value=Mock(getvalue=Mock(return_value=None)))
+
+    assert oracle_database.claim_next_batch("1234") == (None, [])
+    mock_cursor.connection.cursor().fetchall.assert_not_called()
+
+
+@patch("oracle_database.database", autospec=True)
+def test_claim_next_batch_rollback(mock_database):
+    mock_cursor = mock_database.cursor().__enter__()
+    mock_cursor.execute.side_effect = oracledb.Error("Database error")
+
+    with pytest.raises(oracledb.Error):
+        oracle_database.claim_next_batch("1234")
+
+    mock_cursor.connection.rollback.assert_called_once()
+
+
+def test_claim_next_batch_block():
+    block = oracle_database.claim_next_batch_block()
+
+    assert "pkg_notify_wrap.f_get_next_batch(:batch_id)" in block
+    assert "SET message_id = REGEXP_REPLACE(" in block
+    assert f"OPEN :recipients FOR {oracle_database.recipients_query()};" in block
+    assert "COMMIT;" in block
+
+
 @patch("oracle_database.database", autospec=True)
-def test_get_recipients(mock_database):
+def test_get_recipients_page(mock_database):
     raw_recipient_data = [
         ("1111111111", "message_reference_1"),
         ("2222222222", "message_reference_2"),
     ]
 
     mock_cursor = mock_database.cursor().__enter__()
-    mock_cursor.fetchall = Mock(return_value=raw_recipient_data)
+    mock_cursor.description = [("NHS_NUMBER",), ("MESSAGE_ID",)]
+    mock_cursor.fetchall = mock_fetchall(mock_cursor, raw_recipient_data)
 
-    batch_id = '1234'
+    recipients = oracle_database.get_recipients_page("1234", page_size=2)
 
-    recipients = oracle_database.get_recipients(batch_id)
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT nhs_number, message_id FROM v_notify_message_queue "
+        "WHERE batch_id = :batch_id AND message_status = :message_status "
+        "ORDER BY nhs_number FETCH FIRST :page_size ROWS ONLY",
+        {"batch_id": "1234", "message_status": "requested", "page_size": 2},
+    )
+    assert mock_cursor.arraysize == 2
+    assert mock_cursor.prefetchrows == 3
+    assert all(isinstance(r, Recipient) for r in recipients)
+    assert [(r.nhs_number, r.message_id) for r in recipients] == raw_recipient_data
 
-    mock_cursor.execute.assert_called_with(
-        "SELECT * FROM v_notify_message_queue WHERE batch_id = :batch_id", {'batch_id': batch_id})
 
-    assert len(recipients) == 2
-    assert isinstance(recipients[0], Recipient)
-    assert recipients[0].nhs_number == "1111111111"
-    assert recipients[0].message_id == "message_reference_1"
-    assert isinstance(recipients[1], Recipient)
-    assert recipients[1].nhs_number == "2222222222"
-    assert recipients[1].message_id == "message_reference_2"
+@patch("oracle_database.database", autospec=True)
+def test_get_recipients_page_after_nhs_number(mock_database):
+    mock_cursor = mock_database.cursor().__enter__()
+    mock_cursor.description = [("NHS_NUMBER",), ("MESSAGE_ID",)]
+    mock_cursor.fetchall = mock_fetchall(mock_cursor, [("3333333333", "message_reference_3")])
+
+    recipients = oracle_database.get_recipients_page("1234", "2222222222")
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT nhs_number, message_id FROM v_notify_message_queue "
+        "WHERE batch_id = :batch_id AND message_status = :message_status AND nhs_number > :after_nhs_number "
+        "ORDER BY nhs_number FETCH FIRST :page_size ROWS ONLY",
+        {
+            "batch_id": "1234",
+            "message_status": "requested",
+            "page_size": oracle_database.FETCH_PAGE_SIZE,
+            "after_nhs_number": "2222222222",
+        },
+    )
+    assert [r.nhs_number for r in recipients] == ["3333333333"]
 
 
 @patch("oracle_database.database", autospec=True)
-def test_update_message_id(mock_database):
-    recipient = Recipient(("1111111111", "message_reference_1"))
+def test_get_recipients_page_maps_columns_by_name(mock_database):
+    mock_cursor = mock_database.cursor().__enter__()
+    mock_cursor.description = [("MESSAGE_ID",), ("POSTCODE",), ("NHS_NUMBER",)]
+    mock_cursor.fetchall = mock_fetchall(mock_cursor, [("message_reference_1", "AB1 2CD", "1111111111")])
 
+    recipients = oracle_database.get_recipients_page("1234", columns=("message_id", "postcode", "nhs_number"))
+
+    assert mock_cursor.execute.call_args.args[0].startswith(
+        "SELECT message_id, postcode, nhs_number FROM v_notify_message_queue "
+    )
+    recipient = recipients[0]
+    assert recipient.nhs_number == "1111111111"
+    assert recipient.message_id == "message_reference_1"
+    assert recipient.postcode == "AB1 2CD"
+    assert recipient.address_line_1 is None
+
+
+@patch("oracle_database.database", autospec=True)
+def test_get_recipients_page_error(mock_database):
     mock_cursor = mock_database.cursor().__enter__()
+    mock_cursor.execute.side_effect = oracledb.Error("Database error")
 
-    oracle_database.update_message_id(recipient)
+    with pytest.raises(oracledb.Error):
+        oracle_database.get_recipients_page("1234")
+
+
+def test_recipients_query_rejects_unknown_columns():
+    with pytest.raises(ValueError):
+        oracle_database.recipients_query(("nhs_number", "1; DROP TABLE notify_message_queue"))
+
+
+def test_recipients_query_requires_the_paging_key():
+    with pytest.raises(ValueError):
+        oracle_database.recipients_query(("message_id",))
+
+
+@patch("oracle_database.database", autospec=True)
+def test_update_message_ids(mock_database):
+    recipients = [
+        Recipient(("1111111111", "message_reference_1")),
+        Recipient(("2222222222", "message_reference_2")),
+    ]
+
+    mock_cursor = mock_database.cursor().__enter__()
+    mock_cursor.getbatcherrors = Mock(return_value=[])
 
-    mock_cursor.execute.assert_called_with(
-        "UPDATE v_notify_message_queue SET message_id = :message_id WHERE nhs_number = :nhs_number",
-        {'message_id': recipient.message_id, 'nhs_number': recipient.nhs_number}
+    batch_errors = oracle_database.update_message_ids("batch_id", recipients)
+
+    mock_cursor.executemany.assert_called_once_with(
+        "UPDATE v_notify_message_queue SET message_id = :message_id WHERE nhs_number = :nhs_number AND batch_id = :batch_id",
+        [
+            {"message_id": "message_reference_1", "nhs_number": "1111111111", "batch_id": "batch_id"},
+            {"message_id": "message_reference_2", "nhs_number": "2222222222", "batch_id": "batch_id"},
+        ],
+        batcherrors=True,
     )
     mock_cursor.connection.commit.assert_called_once()
+    assert batch_errors == []
 
 
 @patch("oracle_database.database", autospec=True)
-def test_mark_batch_as_sent(mock_database):
-    batch_id = '1234'
+def test_update_message_ids_reports_batch_errors(mock_database):
+    recipients = [
+        Recipient(("1111111111", "message_reference_1")),
+        Recipient(("2222222222", "message_reference_2")),
+    ]
+    batch_error = Mock(offset=1, message="ORA-12899: value too large")
 
     mock_cursor = mock_database.cursor().__enter__()
+    mock_cursor.getbatcherrors = Mock(return_value=[batch_error])
 
-    oracle_database.mark_batch_as_sent(batch_id)
+    batch_errors = oracle_database.update_message_ids("batch_id", recipients)
 
-    mock_cursor.callfunc.assert_called_with(
-        "PKG_NOTIFY_WRAP.f_update_message_status",
-        oracledb.NUMBER,
-        [batch_id, None, "sending"]
+    assert batch_errors == [batch_error]
+    mock_cursor.connection.commit.assert_called_once()
+    mock_cursor.connection.rollback.assert_not_called()
+
+
+@patch("oracle_database.database", autospec=True)
+def test_release_recipients(mock_database):
+    recipients = [Recipient(("1111111111", None))]
+
+    mock_cursor = mock_database.cursor().__enter__()
+
+    oracle_database.release_recipients("batch_id", recipients)
+
+    mock_cursor.executemany.assert_called_once_with(
+        "UPDATE v_notify_message_queue SET message_status = :new_status, batch_id = NULL "
+        "WHERE nhs_number = :nhs_number AND batch_id = :batch_id AND message_status = :message_status",
+        [{"new_status": "new", "nhs_number": "1111111111", "batch_id": "batch_id", "message_status": "requested"}],
     )
     mock_cursor.connection.commit.assert_called_once()
 
 
 @patch("oracle_database.database", autospec=True)
-def test_mark_batch_as_sent_rollback(mock_database):
+def test_mark_recipients_as_sent(mock_database):
+    recipients = [
+        Recipient(("1111111111", "message_reference_1")),
+        Recipient(("2222222222", "message_reference_2")),
+    ]
+
+    mock_cursor = mock_database.cursor().__enter__()
+
+    oracle_database.mark_recipients_as_sent("chunk_batch_id", recipients)
+
+    statement, rows = mock_cursor.executemany.call_args.args
+    assert "UPDATE v_notify_message_queue SET batch_id = :batch_id WHERE message_id = :message_id;" in statement
+    assert "pkg_notify_wrap.f_update_message_status(:batch_id, :message_id, :message_status);" in statement
+    assert rows == [
+        {"batch_id": "chunk_batch_id", "message_id": "message_reference_1", "message_status": "sending"},
+        {"batch_id": "chunk_batch_id", "message_id": "message_reference_2", "message_status": "sending"},
+    ]
+    mock_cursor.connection.commit.assert_called_once()
+
+
+@patch("oracle_database.database", autospec=True)
+def test_mark_recipients_as_sent_rollback(mock_database):
     mock_cursor = mock_database.cursor().__enter__()
-    mock_cursor.callfunc.side_effect = oracledb.Error("Database error")
+    mock_cursor.executemany.side_effect = oracledb.Error("Database error")
 
     with pytest.raises(oracledb.Error):
-        oracle_database.mark_batch_as_sent("1234")
+        oracle_database.mark_recipients_as_sent("1234", [Recipient(("1111111111", "message_reference_1"))])
 
     mock_cursor.connection.rollback.assert_called_once()
+
+
+@patch("oracle_database.database", autospec=True)
+def test_release_batch(mock_database):
+    mock_cursor = mock_database.cursor().__enter__()
+
+    oracle_database.release_batch("1234")
+
+    mock_cursor.execute.assert_called_once_with(
+        "UPDATE v_notify_message_queue SET message_status = :new_status, batch_id = NULL "
+        "WHERE batch_id = :batch_id AND message_status = :message_status",
+        {"new_status": "new", "batch_id": "1234", "message_status": "requested"},
+    )
+    mock_cursor.connection.commit.assert_called_once()
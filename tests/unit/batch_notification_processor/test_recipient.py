@@ -1,3 +1,4 @@
+import pytest
 from recipient import Recipient
 
 
@@ -45,8 +46,33 @@ class TestRecipient:
         recipient_data = ("1234567890", "message_reference_0", "abc123", "routing_plan_id")
         recipient = Recipient(recipient_data)
 
-        recipient.message_reference = "message_reference"
+        recipient.message_id = "message_reference"
         recipient.message_status = "message_status"
 
-        assert recipient.message_reference == "message_reference"
+        assert recipient.message_id == "message_reference"
         assert recipient.message_status == "message_status"
+
+    def test_recipient_has_no_instance_dict(self):
+        recipient = Recipient(("1234567890", "message_reference_0"))
+
+        assert not hasattr(recipient, "__dict__")
+        with pytest.raises(AttributeError):
+            recipient.unknown_attribute = "value"
+
+    def test_recipient_ignores_extra_columns(self):
+        recipient_data = tuple(f"value_{i}" for i in range(15))
+        recipient = Recipient(recipient_data)
+
+        assert recipient.nhs_number == "value_0"
+        assert recipient.gp_practice_name == "value_12"
+
+    def test_row_factory(self):
+        row_factory = Recipient.row_factory(["message_id", "postcode", "nhs_number"])
+
+        recipient = row_factory("message_reference_0", "AB1 2CD", "1234567890")
+
+        assert recipient.nhs_number == "1234567890"
+        assert recipient.message_id == "message_reference_0"
+        assert recipient.postcode == "AB1 2CD"
+        assert recipient.batch_id is None
+        assert recipient.gp_practice_name is None
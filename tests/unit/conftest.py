@@ -1,7 +1,42 @@
+import circuit_breaker
 import pytest
+import rate_limiter
+import retry
 from unittest.mock import MagicMock, patch
 
 
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    """Retry immediately with a fresh budget, so tests of failed requests do not back off for real."""
+    monkeypatch.setattr(retry, "pause", MagicMock())
+    retry.reset_budget()
+    yield
+    retry.reset_budget()
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit_delay(monkeypatch):
+    """Start each test with fresh rate limiters on a fake clock, which pausing moves forward instantly."""
+    clock = [0.0]
+
+    def advance(seconds):
+        clock[0] += seconds
+
+    monkeypatch.setattr(rate_limiter, "now", lambda: clock[0])
+    monkeypatch.setattr(rate_limiter, "pause", MagicMock(side_effect=advance))
+    rate_limiter.reset()
+    yield
+    rate_limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def closed_circuit_breakers():
+    """Start each test with every circuit breaker closed, as breakers otherwise persist across tests."""
+    circuit_breaker.reset()
+    yield
+    circuit_breaker.reset()
+
+
 @pytest.fixture
 def mock_connection(mock_cursor):
     mock_connection = MagicMock()
@@ -15,11 +15,26 @@ def test_fetch_batch_ids(mock_cursor):
     assert batch_ids == ["batch_id_1", "batch_id_2"]
 
     mock_cursor().__enter__().execute.assert_called_once_with(
-        "SELECT DISTINCT batch_id FROM v_notify_message_queue WHERE message_status = :status",
-        {"status": "sending"}
+        """
+                    SELECT DISTINCT batch_id
+                    FROM notify_message_queue
+                    WHERE message_status = :status
+                    AND read_datestamp >= SYSTIMESTAMP - NUMTODSINTERVAL(:horizon_hours, 'HOUR')
+                """,
+        {"status": "sending", "horizon_hours": 168}
     )
 
 
+@patch("database.cursor")
+def test_fetch_batch_ids_polling_horizon(mock_cursor, monkeypatch):
+    monkeypatch.setenv("STATUS_POLLING_HORIZON_HOURS", "24")
+    mock_cursor.return_value.__enter__.return_value.fetchall.return_value = []
+
+    batch_fetcher.fetch_batch_ids()
+
+    assert mock_cursor().__enter__().execute.call_args.args[1] == {"status": "sending", "horizon_hours": 24}
+
+
 @patch("database.cursor")
 def test_fetch_batch_ids_error(mock_cursor):
     error = oracledb.Error("Database error")
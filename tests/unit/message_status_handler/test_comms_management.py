@@ -1,5 +1,7 @@
+import circuit_breaker
 import comms_management
 import requests_mock
+from unittest.mock import Mock, patch
 
 
 def test_get_read_messages(monkeypatch):
@@ -77,3 +79,123 @@ def test_get_read_messages_exception(monkeypatch):
 
         assert response_json["status"] == "error"
         assert response_json["data"] == []
+
+
+@patch("http_session.session")
+def test_get_statuses_timeout(mock_session, monkeypatch):
+    monkeypatch.setenv("COMMGT_BASE_URL", "http://example.com")
+    mock_session.return_value.get.return_value = Mock(status_code=201, headers={})
+
+    comms_management.get_statuses("c3b8e0c4-5f3d-4a2b-8c7f-1a2e9d6f3b5c", timeout=2.5)
+
+    assert mock_session.return_value.get.call_args.kwargs["timeout"] == 2.5
+
+
+def test_get_read_message_pages_follows_next_links(monkeypatch):
+    monkeypatch.setenv("COMMGT_BASE_URL", "http://example.com")
+
+    with requests_mock.Mocker() as rm:
+        rm.get(
+            "http://example.com/statuses",
+            [
+                {
+                    "status_code": 201,
+                    "json": {
+                        "status": "success",
+                        "data": [{"message_reference": "ref_1"}],
+                        "links": {"next": "/statuses?batchReference=batch_reference&cursor=abc"},
+                    },
+                },
+                {"status_code": 201, "json": {"status": "success", "data": [{"message_reference": "ref_2"}], "links": {}}},
+            ],
+        )
+
+        pages = comms_management.get_read_message_pages("batch_reference")
+
+        assert next(pages)["data"] == [{"message_reference": "ref_1"}]
+        assert rm.call_count == 1
+
+        assert next(pages)["data"] == [{"message_reference": "ref_2"}]
+        assert rm.call_count == 2
+        assert rm.last_request.qs == {"batchreference": ["batch_reference"], "cursor": ["abc"]}
+
+        assert list(pages) == []
+
+
+def test_get_read_message_pages_stops_at_failed_page(monkeypatch):
+    monkeypatch.setenv("COMMGT_BASE_URL", "http://example.com")
+
+    with requests_mock.Mocker() as rm:
+        rm.get(
+            "http://example.com/statuses",
+            [
+                {
+                    "status_code": 201,
+                    "json": {"status": "success", "data": [{"message_reference": "ref_1"}], "links": {"next": "?cursor=abc"}},
+                },
+                {"status_code": 500, "text": "Internal Server Error"},
+            ],
+        )
+
+        pages = list(comms_management.get_read_message_pages("batch_reference"))
+
+        assert len(pages) == 2
+        assert pages[1]["status"] == "error"
+        assert pages[1]["data"] == []
+
+
+def test_get_read_messages_gathers_all_pages(monkeypatch):
+    monkeypatch.setenv("COMMGT_BASE_URL", "http://example.com")
+
+    with requests_mock.Mocker() as rm:
+        rm.get(
+            "http://example.com/statuses",
+            [
+                {
+                    "status_code": 201,
+                    "json": {"status": "success", "data": [{"message_reference": "ref_1"}], "links": {"next": "?cursor=abc"}},
+                },
+                {"status_code": 201, "json": {"status": "success", "data": [{"message_reference": "ref_2"}]}},
+            ],
+        )
+
+        response_json = comms_management.get_read_messages("batch_reference")
+
+        assert response_json["status"] == "success"
+        assert response_json["data"] == [{"message_reference": "ref_1"}, {"message_reference": "ref_2"}]
+
+
+def test_get_read_messages_retries_transient_errors(monkeypatch):
+    monkeypatch.setenv("COMMGT_BASE_URL", "http://example.com")
+
+    with requests_mock.Mocker() as rm:
+        adapter = rm.get(
+            "http://example.com/statuses",
+            [
+                {"status_code": 502},
+                {"status_code": 201, "json": {"status": "success", "data": [{"message_reference": "ref_1"}]}},
+            ],
+        )
+
+        response_json = comms_management.get_read_messages("batch_reference")
+
+        assert response_json["data"] == [{"message_reference": "ref_1"}]
+        assert adapter.call_count == 2
+
+
+def test_get_read_message_pages_opens_circuit_after_repeated_server_errors(monkeypatch):
+    monkeypatch.setenv("COMMGT_BASE_URL", "http://example.com")
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "2")
+    monkeypatch.setenv("RETRY_MAX_ATTEMPTS", "1")
+
+    with requests_mock.Mocker() as rm:
+        adapter = rm.get("http://example.com/statuses", status_code=503, text="Service Unavailable")
+
+        for _ in range(2):
+            assert list(comms_management.get_read_message_pages("batch_reference"))[0]["status"] == "error"
+
+        pages = list(comms_management.get_read_message_pages("batch_reference"))
+
+        assert adapter.call_count == 2
+        assert pages == [{"status": "error", "message": "The notify circuit breaker is open", "data": []}]
+        assert circuit_breaker.states()["notify"]["state"] == "open"
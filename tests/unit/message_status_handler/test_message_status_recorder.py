@@ -4,9 +4,11 @@ import message_status_recorder
 
 import database
 
-@patch("message_status_recorder.update_message_status", return_value=12)
+
+@patch("message_status_recorder.update_message_statuses", return_value=[0, 12])
 @patch("database.cursor")
-def test_record_message_statuses(mock_cursor, mock_update_message_status):
+def test_record_message_statuses(mock_cursor, mock_update_message_statuses):
+    mock_cursor().__enter__().fetchall.return_value = [("message_reference_1",), ("message_reference_2",)]
     batch_id = "batch_id"
     json_data = {
         "data": [
@@ -14,33 +16,105 @@ def test_record_message_statuses(mock_cursor, mock_update_message_status):
             {"message_reference": "message_reference_2"},
         ]
     }
-    message_status_recorder.record_message_statuses(batch_id, json_data)
+    response_codes = message_status_recorder.record_message_statuses(batch_id, json_data)
 
-    assert mock_update_message_status.call_count == 2
-    mock_update_message_status.assert_any_call(mock_cursor().__enter__(), batch_id, "message_reference_1")
-    mock_update_message_status.assert_any_call(mock_cursor().__enter__(), batch_id, "message_reference_2")
+    assert response_codes == [0, 12]
+    mock_update_message_statuses.assert_called_once_with(
+        mock_cursor().__enter__(), batch_id, ["message_reference_1", "message_reference_2"]
+    )
+    mock_cursor().__enter__().connection.commit.assert_called_once()
 
 
+@patch("message_status_recorder.update_message_statuses", return_value=[0])
 @patch("database.cursor")
-def test_update_message_status(mock_cursor):
+def test_record_message_statuses_skips_messages_already_read(mock_cursor, mock_update_message_statuses):
     mock_cursor_contextmanager = mock_cursor().__enter__()
-    mock_var = Mock(getvalue=Mock(return_value=12))
-    mock_cursor_contextmanager.var.return_value = mock_var
+    mock_cursor_contextmanager.fetchall.return_value = [("message_reference_2",), ("message_reference_3",)]
+    json_data = {
+        "data": [
+            {"message_reference": "message_reference_1"},
+            {"message_reference": "message_reference_2"},
+        ]
+    }
 
-    response_code = message_status_recorder.update_message_status(mock_cursor_contextmanager, "batch_id", "message_reference_1")
+    response_codes = message_status_recorder.record_message_statuses("batch_id", json_data)
 
-    assert mock_cursor_contextmanager.execute.call_count == 1
-    assert response_code == 12
+    assert response_codes == [0]
     mock_cursor_contextmanager.execute.assert_called_once_with(
+        "SELECT message_id FROM v_notify_message_queue WHERE batch_id = :batch_id AND message_status != :status "
+        "AND message_id IN (:reference_0, :reference_1)",
+        {
+            "batch_id": "batch_id",
+            "status": "read",
+            "reference_0": "message_reference_1",
+            "reference_1": "message_reference_2",
+        },
+    )
+    mock_update_message_statuses.assert_called_once_with(mock_cursor_contextmanager, "batch_id", ["message_reference_2"])
+
+
+@patch("message_status_recorder.update_message_statuses")
+@patch("database.cursor")
+def test_record_message_statuses_all_already_read(mock_cursor, mock_update_message_statuses):
+    mock_cursor().__enter__().fetchall.return_value = []
+    json_data = {"data": [{"message_reference": "message_reference_1"}]}
+
+    response_codes = message_status_recorder.record_message_statuses("batch_id", json_data)
+
+    assert response_codes == []
+    mock_update_message_statuses.assert_not_called()
+    mock_cursor().__enter__().connection.commit.assert_not_called()
+
+
+@patch("database.cursor")
+def test_unread_message_references_checks_only_the_given_references_in_bounded_queries(mock_cursor):
+    mock_cursor_contextmanager = mock_cursor().__enter__()
+    mock_cursor_contextmanager.fetchall.side_effect = [[("reference_0",)], [("reference_2",)]]
+
+    with patch("message_status_recorder.MAX_IN_LIST_SIZE", 2):
+        unread = message_status_recorder.unread_message_references(
+            mock_cursor_contextmanager, "batch_id", ["reference_0", "reference_1", "reference_2"]
+        )
+
+    assert unread == {"reference_0", "reference_2"}
+    assert mock_cursor_contextmanager.execute.call_count == 2
+    assert mock_cursor_contextmanager.execute.call_args.args[1] == {
+        "batch_id": "batch_id",
+        "status": "read",
+        "reference_0": "reference_2",
+    }
+
+
+@patch("message_status_recorder.update_message_statuses")
+@patch("database.cursor")
+def test_record_message_statuses_no_data(mock_cursor, mock_update_message_statuses):
+    response_codes = message_status_recorder.record_message_statuses("batch_id", {"data": []})
+
+    assert response_codes == []
+    mock_update_message_statuses.assert_not_called()
+
+
+@patch("database.cursor")
+def test_update_message_statuses(mock_cursor):
+    mock_cursor_contextmanager = mock_cursor().__enter__()
+    mock_var = Mock(getvalue=Mock(side_effect=[0, 12]))
+    mock_cursor_contextmanager.var.return_value = mock_var
+
+    response_codes = message_status_recorder.update_message_statuses(
+        mock_cursor_contextmanager, "batch_id", ["message_reference_1", "message_reference_2"]
+    )
+
+    assert response_codes == [0, 12]
+    mock_cursor_contextmanager.var.assert_called_once_with(int, arraysize=2)
+    mock_cursor_contextmanager.setinputsizes.assert_called_once_with(out_val=mock_var)
+    mock_cursor_contextmanager.executemany.assert_called_once_with(
         """
             begin
                 :out_val := pkg_notify_wrap.f_update_message_status(:in_val1, :in_val2, :in_val3);
             end;
         """,
-        {
-            "in_val1": "batch_id",
-            "in_val2": "message_reference_1",
-            "in_val3": "read",
-            "out_val": mock_var,
-        },
+        [
+            {"in_val1": "batch_id", "in_val2": "message_reference_1", "in_val3": "read"},
+            {"in_val1": "batch_id", "in_val2": "message_reference_2", "in_val3": "read"},
+        ],
     )
@@ -1,15 +1,17 @@
+import circuit_breaker
 import json
 import scheduled_lambda_function as lambda_function
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 
 @patch("batch_fetcher.fetch_batch_ids")
-@patch("comms_management.get_read_messages")
+@patch("comms_management.get_read_message_pages")
 @patch("message_status_recorder.record_message_statuses")
-def test_lambda_handler(mock_record_message_statuses, mock_get_read_messages, mock_fetch_batch_ids):
+def test_lambda_handler(mock_record_message_statuses, mock_get_read_message_pages, mock_fetch_batch_ids):
     mock_fetch_batch_ids.return_value = ["12345"]
-    mock_get_read_messages.return_value = [{"message_id": "123", "status": "read"}]
-    mock_record_message_statuses.return_value = {"status": "success"}
+    page = {"status": "success", "data": [{"message_reference": "123", "supplierStatus": "read"}]}
+    mock_get_read_message_pages.return_value = iter([page])
+    mock_record_message_statuses.return_value = [0]
 
     response = lambda_function.lambda_handler({}, None)
 
@@ -18,18 +20,22 @@ def test_lambda_handler(mock_record_message_statuses, mock_get_read_messages, mo
         "message": "Message status handler finished",
         "data": {
             "12345": {
-                "notification_status": [{"message_id": "123", "status": "read"}],
-                "bcss_response": {"status": "success"},
+                "pages": 1,
+                "read_messages": 1,
+                "bcss_response": [0],
             }
-        }
+        },
+        "continuation": False,
+        "circuit_breakers": {"notify": {"state": "closed", "failures": 0}},
     }
+    mock_record_message_statuses.assert_called_once_with("12345", page)
 
 
 @patch("batch_fetcher.fetch_batch_ids")
-@patch("comms_management.get_read_messages")
-def test_lambda_handler_no_messages(mock_get_read_messages, mock_fetch_batch_ids):
+@patch("comms_management.get_read_message_pages")
+def test_lambda_handler_no_messages(mock_get_read_message_pages, mock_fetch_batch_ids):
     mock_fetch_batch_ids.return_value = ["12345"]
-    mock_get_read_messages.return_value = []
+    mock_get_read_message_pages.return_value = iter([{"status": "success", "data": []}])
 
     response = lambda_function.lambda_handler({}, None)
 
@@ -38,30 +44,33 @@ def test_lambda_handler_no_messages(mock_get_read_messages, mock_fetch_batch_ids
         "message": "Message status handler finished",
         "data": {
             "12345": {
-                "notification_status": [],
+                "pages": 1,
+                "read_messages": 0,
             }
-        }
+        },
+        "continuation": False,
+        "circuit_breakers": {"notify": {"state": "closed", "failures": 0}},
     }
 
 
 @patch("batch_fetcher.fetch_batch_ids")
-@patch("comms_management.get_read_messages")
-def test_lambda_handler_exception(mock_get_read_messages, mock_fetch_batch_ids):
+@patch("comms_management.get_read_message_pages")
+def test_lambda_handler_exception(mock_get_read_message_pages, mock_fetch_batch_ids):
     mock_fetch_batch_ids.return_value = ["12345"]
-    mock_get_read_messages.side_effect = Exception("Test exception")
+    mock_get_read_message_pages.side_effect = Exception("Test exception")
 
     response = lambda_function.lambda_handler({}, None)
 
     assert response["statusCode"] == 500
-    assert json.loads(response["body"]) == {"message": "Internal Server Error: Test exception"}
+    assert json.loads(response["body"]) == {"message": "Internal Server Error: Test exception", "circuit_breakers": {"notify": {"state": "closed", "failures": 0}}}
 
 
 @patch("batch_fetcher.fetch_batch_ids")
-@patch("comms_management.get_read_messages")
+@patch("comms_management.get_read_message_pages")
 @patch("message_status_recorder.record_message_statuses")
-def test_lambda_handler_with_bcss_error(mock_record_message_statuses, mock_get_read_messages, mock_fetch_batch_ids):
+def test_lambda_handler_with_bcss_error(mock_record_message_statuses, mock_get_read_message_pages, mock_fetch_batch_ids):
     mock_fetch_batch_ids.return_value = ["12345"]
-    mock_get_read_messages.return_value = [{"message_id": "123", "status": "read"}]
+    mock_get_read_message_pages.return_value = iter([{"data": [{"message_reference": "123"}]}])
     mock_record_message_statuses.side_effect = Exception("BCSS error")
 
     response = lambda_function.lambda_handler({}, None)
@@ -69,4 +78,121 @@ def test_lambda_handler_with_bcss_error(mock_record_message_statuses, mock_get_r
     assert response["statusCode"] == 500
     assert json.loads(response["body"]) == {
         "message": "Internal Server Error: BCSS error",
+        "circuit_breakers": {"notify": {"state": "closed", "failures": 0}},
+    }
+
+
+@patch("batch_fetcher.fetch_batch_ids")
+@patch("comms_management.get_read_message_pages")
+@patch("message_status_recorder.record_message_statuses")
+def test_lambda_handler_multiple_batches(mock_record_message_statuses, mock_get_read_message_pages, mock_fetch_batch_ids, monkeypatch):
+    monkeypatch.setenv("MAX_CONCURRENT_REQUESTS", "2")
+    monkeypatch.setenv("STATUSES_REQUEST_TIMEOUT", "5")
+    mock_fetch_batch_ids.return_value = ["12345", "67890", "24680"]
+    mock_get_read_message_pages.side_effect = lambda batch_id, _timeout: iter([{"data": [{"message_reference": f"ref_{batch_id}"}]}])
+    mock_record_message_statuses.return_value = [0]
+
+    response = lambda_function.lambda_handler({}, None)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert set(body["data"].keys()) == {"12345", "67890", "24680"}
+    assert body["data"]["67890"]["read_messages"] == 1
+    assert body["data"]["67890"]["bcss_response"] == [0]
+
+    for batch_id in ["12345", "67890", "24680"]:
+        mock_get_read_message_pages.assert_any_call(batch_id, 5.0)
+        mock_record_message_statuses.assert_any_call(batch_id, {"data": [{"message_reference": f"ref_{batch_id}"}]})
+
+
+@patch("batch_fetcher.fetch_batch_ids")
+@patch("comms_management.get_read_message_pages")
+@patch("message_status_recorder.record_message_statuses")
+def test_lambda_handler_stops_near_deadline(mock_record_message_statuses, mock_get_read_message_pages, mock_fetch_batch_ids, monkeypatch):
+    monkeypatch.setenv("MAX_CONCURRENT_REQUESTS", "1")
+    monkeypatch.setenv("BATCH_ESTIMATE_SECONDS", "1")
+    mock_fetch_batch_ids.return_value = ["12345", "67890", "24680"]
+    mock_get_read_message_pages.side_effect = lambda *_args, **_kwargs: iter([{"data": [{"message_reference": "ref"}]}])
+    remaining_millis = [40000]
+
+    def record_message_statuses(_batch_id, _messages):
+        remaining_millis[0] -= 20000
+        return [0]
+
+    mock_record_message_statuses.side_effect = record_message_statuses
+    context = Mock(get_remaining_time_in_millis=Mock(side_effect=lambda: remaining_millis[0]))
+
+    response = lambda_function.lambda_handler({}, context)
+
+    body = json.loads(response["body"])
+    assert list(body["data"].keys()) == ["12345", "67890"]
+    assert body["continuation"] is True
+    assert mock_get_read_message_pages.call_count == 2
+
+
+@patch("batch_fetcher.fetch_batch_ids")
+@patch("comms_management.get_read_message_pages")
+@patch("message_status_recorder.record_message_statuses")
+def test_lambda_handler_records_each_page_before_fetching_the_next(
+    mock_record_message_statuses, mock_get_read_message_pages, mock_fetch_batch_ids
+):
+    mock_fetch_batch_ids.return_value = ["12345"]
+    events = []
+    pages = [
+        {"data": [{"message_reference": "ref_1"}, {"message_reference": "ref_2"}], "links": {"next": "?page=2"}},
+        {"data": [{"message_reference": "ref_3"}]},
+    ]
+
+    def get_read_message_pages(*_args, **_kwargs):
+        for idx, page in enumerate(pages):
+            events.append(f"fetch {idx}")
+            yield page
+
+    mock_get_read_message_pages.side_effect = get_read_message_pages
+    mock_record_message_statuses.side_effect = lambda _batch_id, page: events.append("record") or [0] * len(page["data"])
+
+    response = lambda_function.lambda_handler({}, None)
+
+    assert events == ["fetch 0", "record", "fetch 1", "record"]
+    assert json.loads(response["body"])["data"]["12345"] == {"pages": 2, "read_messages": 3, "bcss_response": [0, 0, 0]}
+
+
+@patch("batch_fetcher.fetch_batch_ids")
+@patch("comms_management.get_read_message_pages")
+def test_lambda_handler_skips_batches_while_notify_circuit_is_open(mock_get_read_message_pages, mock_fetch_batch_ids):
+    mock_fetch_batch_ids.return_value = ["12345", "67890"]
+    notify = circuit_breaker.circuit("notify")
+
+    for _ in range(notify.failure_threshold):
+        notify.record(False)
+
+    response = lambda_function.lambda_handler({}, None)
+
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 200
+    assert body["data"] == {}
+    assert body["circuit_breakers"]["notify"]["state"] == "open"
+    mock_get_read_message_pages.assert_not_called()
+
+
+@patch("batch_fetcher.fetch_batch_ids")
+@patch("comms_management.get_read_message_pages")
+@patch("message_status_recorder.record_message_statuses")
+def test_lambda_handler_reports_failed_status_pages(
+    mock_record_message_statuses, mock_get_read_message_pages, mock_fetch_batch_ids
+):
+    mock_fetch_batch_ids.return_value = ["12345"]
+    mock_get_read_message_pages.return_value = iter([
+        {"data": [{"message_reference": "ref_1"}], "links": {"next": "?page=2"}},
+        {"status": "error", "message": "Failed to fetch messages that have been read: Bad Gateway", "data": []},
+    ])
+    mock_record_message_statuses.return_value = [0]
+
+    response = lambda_function.lambda_handler({}, None)
+
+    assert json.loads(response["body"])["data"]["12345"] == {
+        "pages": 1,
+        "read_messages": 1,
+        "bcss_response": [0],
+        "error": "Failed to fetch messages that have been read: Bad Gateway",
     }
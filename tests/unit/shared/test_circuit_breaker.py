@@ -0,0 +1,122 @@
+import pytest
+import requests
+from unittest.mock import Mock
+import circuit_breaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(circuit_breaker, "now", lambda: clock[0])
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = circuit_breaker.CircuitBreaker(threshold=3, cool_down=30)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+
+    assert breaker.state == circuit_breaker.CLOSED
+
+    assert breaker.allow()
+    breaker.record(False)
+
+    assert breaker.state == circuit_breaker.OPEN
+    assert not breaker.available()
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = circuit_breaker.CircuitBreaker(threshold=2, cool_down=30)
+
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.failures == 1
+
+
+def test_breaker_half_opens_after_cool_down_and_allows_a_single_trial(clock):
+    breaker = circuit_breaker.CircuitBreaker(threshold=1, cool_down=30)
+    breaker.record(False)
+    clock[0] = 29.9
+
+    assert not breaker.available()
+
+    clock[0] = 30
+
+    assert breaker.snapshot() == {"state": circuit_breaker.HALF_OPEN, "failures": 1}
+    assert breaker.available()
+    assert breaker.allow()
+    assert not breaker.available()
+    assert not breaker.allow()
+
+
+def test_successful_trial_closes_the_breaker(clock):
+    breaker = circuit_breaker.CircuitBreaker(threshold=1, cool_down=30)
+    breaker.record(False)
+    clock[0] = 30
+
+    assert breaker.allow()
+    breaker.record(True)
+
+    assert breaker.snapshot() == {"state": circuit_breaker.CLOSED, "failures": 0}
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker_for_another_cool_down(clock):
+    breaker = circuit_breaker.CircuitBreaker(threshold=3, cool_down=30)
+
+    for _ in range(3):
+        breaker.record(False)
+
+    clock[0] = 30
+    assert breaker.allow()
+    breaker.record(False)
+
+    assert breaker.state == circuit_breaker.OPEN
+    clock[0] = 59
+    assert not breaker.allow()
+    clock[0] = 60
+    assert breaker.allow()
+
+
+def test_notify_counts_server_errors_and_lost_connections_as_failures(monkeypatch, clock):
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3")
+
+    circuit_breaker.notify(lambda: Mock(status_code=503))
+    with pytest.raises(requests.ConnectionError):
+        circuit_breaker.notify(Mock(side_effect=requests.ConnectionError("Connection refused")))
+
+    assert circuit_breaker.states() == {"notify": {"state": "closed", "failures": 2}}
+
+    circuit_breaker.notify(lambda: Mock(status_code=500))
+    request = Mock()
+
+    with pytest.raises(circuit_breaker.CircuitOpenError):
+        circuit_breaker.notify(request)
+
+    request.assert_not_called()
+    assert circuit_breaker.states() == {"notify": {"state": "open", "failures": 3}}
+
+
+def test_notify_does_not_count_client_errors_or_other_exceptions(monkeypatch):
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "1")
+
+    response = circuit_breaker.notify(lambda: Mock(status_code=400))
+    with pytest.raises(ValueError):
+        circuit_breaker.notify(Mock(side_effect=ValueError("Bad body")))
+
+    assert response.status_code == 400
+    assert circuit_breaker.states() == {"notify": {"state": "closed", "failures": 0}}
+
+
+def test_breakers_are_shared_per_dependency(monkeypatch):
+    monkeypatch.setenv("CIRCUIT_BREAKER_COOL_DOWN_SECONDS", "5")
+
+    assert circuit_breaker.circuit("notify") is circuit_breaker.circuit("notify")
+    assert circuit_breaker.circuit("notify") is not circuit_breaker.circuit("database")
+    assert circuit_breaker.circuit("database").cool_down_seconds == 5.0
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import Mock, patch
+import circuit_breaker
 import database
 import oracledb
 
@@ -14,12 +15,19 @@ def mocked_env(monkeypatch):
     monkeypatch.setenv("REGION_NAME", "uk-west-1")
 
 
-@patch("oracledb.connect")
-def test_connection(mock_oracledb_connect):
+@pytest.fixture(autouse=True)
+def reset_pool():
+    yield
+    database.close_pool()
+
+
+@patch("oracledb.create_pool")
+def test_connection(mock_create_pool):
     with database.connection() as conn:
         assert conn is not None
 
-    assert conn.closed
+    mock_create_pool.return_value.acquire.assert_called_once()
+    conn.close.assert_called_once()
 
 @pytest.mark.skip
 # test marked to skip as there is something funny with the python Mock on the oracledb.connect
@@ -36,13 +44,108 @@ def test_failed_connection_to_db():
 
         assert str(exc_info.value) == "Failed to connect to the database. Something's not right"
 
-@patch("oracledb.connect")
-def test_cursor(mock_oracledb_connect):
+@patch("oracledb.create_pool")
+def test_cursor(mock_create_pool):
     with database.cursor() as cursor:
         assert cursor is not None
 
-    assert cursor.closed
+    cursor.close.assert_called_once()
+
+
+@patch("oracledb.create_pool")
+def test_pool_is_reused_across_connections(mock_create_pool):
+    with database.connection():
+        pass
+    with database.connection():
+        pass
+
+    mock_create_pool.assert_called_once_with(
+        user="test",
+        password="test",
+        dsn="test_host:1521/test_sid",
+        min=database.POOL_MIN,
+        max=database.POOL_MAX,
+        increment=database.POOL_INCREMENT,
+        ping_interval=database.POOL_PING_INTERVAL,
+        getmode=oracledb.POOL_GETMODE_WAIT,
+    )
+    assert mock_create_pool.return_value.acquire.call_count == 2
+
+
+@patch("oracledb.create_pool")
+def test_close_pool(mock_create_pool):
+    with database.connection():
+        pass
+
+    database.close_pool()
+
+    mock_create_pool.return_value.close.assert_called_once_with(force=False)
+
+    with database.connection():
+        pass
+
+    assert mock_create_pool.call_count == 2
+
+
+@patch("oracledb.create_pool")
+def test_failed_pool_acquire(mock_create_pool):
+    mock_create_pool.return_value.acquire.side_effect = oracledb.Error("Pool exhausted")
+
+    with pytest.raises(database.DatabaseConnectionError) as exc_info:
+        with database.connection():
+            pass
+
+    assert str(exc_info.value) == "Error Connecting to Database: Pool exhausted"
+
+
+@patch("oracledb.create_pool")
+def test_unreachable_database_opens_circuit(mock_create_pool, monkeypatch):
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "2")
+    mock_create_pool.return_value.acquire.side_effect = oracledb.OperationalError("DPY-6005: cannot connect to database")
+
+    for _ in range(2):
+        with pytest.raises(database.DatabaseConnectionError):
+            with database.connection():
+                pass
+
+    with pytest.raises(database.DatabaseConnectionError) as exc_info:
+        with database.connection():
+            pass
+
+    assert mock_create_pool.return_value.acquire.call_count == 2
+    assert str(exc_info.value) == "Error Connecting to Database: the database circuit breaker is open"
+    assert circuit_breaker.states()["database"] == {"state": "open", "failures": 2}
+
+
+@patch("oracledb.create_pool")
+def test_statement_errors_do_not_open_circuit(mock_create_pool, monkeypatch):
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "1")
+
+    with pytest.raises(database.DatabaseConnectionError):
+        with database.cursor() as cursor:
+            cursor.execute.side_effect = oracledb.IntegrityError("ORA-00001: unique constraint violated")
+            cursor.execute("INSERT")
+
+    with database.cursor() as cursor:
+        assert cursor is not None
+
+    assert circuit_breaker.states()["database"] == {"state": "closed", "failures": 0}
 
 
 def test_connection_params():
     assert database.connection_params() == {"user": "test", "password": "test", "dsn": "test_host:1521/test_sid"}
+
+
+def test_pool_params(monkeypatch):
+    monkeypatch.setenv("DATABASE_POOL_MIN", "2")
+    monkeypatch.setenv("DATABASE_POOL_MAX", "8")
+    monkeypatch.setenv("DATABASE_POOL_INCREMENT", "2")
+    monkeypatch.setenv("DATABASE_POOL_PING_INTERVAL", "0")
+
+    assert database.pool_params() == {
+        "min": 2,
+        "max": 8,
+        "increment": 2,
+        "ping_interval": 0,
+        "getmode": oracledb.POOL_GETMODE_WAIT,
+    }
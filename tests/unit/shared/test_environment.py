@@ -9,14 +9,23 @@ from unittest.mock import Mock, patch
 
 @pytest.fixture(autouse=True)
 def clean_env():
-    """Fixture to clean up environment variables after each test."""
+    """Fixture to clean up environment variables and cached secrets after each test."""
+    environment.reset()
     yield
+    environment.reset()
 
-    for key in environment.KEYS:
+    for key in environment.KEYS + ["ENVIRONMENT_SEEDED"]:
         if key in os.environ:
             del os.environ[key]
 
 
+def join_refresh():
+    fetch = environment._SECRETS.fetch
+
+    if fetch is not None:
+        fetch.join()
+
+
 @pytest.fixture
 def mock_secrets_response():
     return json.dumps({
@@ -77,3 +86,85 @@ def test_seed_already_seeded(monkeypatch, mock_secrets_response):
         environment.seed()
 
         assert adapter.call_count == 0
+
+
+def test_seed_reuses_cached_secrets(monkeypatch, mock_secrets_response):
+    """Test that a warm invocation within the TTL does not fetch the secrets again."""
+    monkeypatch.setenv("SECRET_ARN", "test_secret_arn")
+
+    with requests_mock.Mocker() as m:
+        adapter = m.get("http://localhost:2773/secretsmanager/get?secretId=test_secret_arn&versionStage=AWSCURRENT", text=mock_secrets_response)
+
+        environment.seed()
+        environment.seed()
+
+        assert adapter.call_count == 1
+
+
+def test_seed_refreshes_stale_secrets_in_background(monkeypatch, mock_secrets_response):
+    """Test that stale secrets are served while a background refresh picks up a rotated secret."""
+    monkeypatch.setenv("SECRET_ARN", "test_secret_arn")
+    monkeypatch.setenv("SECRETS_TTL_SECONDS", "0")
+    rotated_secrets_response = json.dumps({
+        "SecretString": json.dumps({**json.loads(json.loads(mock_secrets_response)["SecretString"]), "api_key": "rotated_api_key"})
+    })
+
+    with requests_mock.Mocker() as m:
+        adapter = m.get(
+            "http://localhost:2773/secretsmanager/get?secretId=test_secret_arn&versionStage=AWSCURRENT",
+            [{"text": mock_secrets_response}, {"text": rotated_secrets_response}],
+        )
+
+        environment.seed()
+        assert os.environ["API_KEY"] == "test_api_key"
+
+        environment.seed()
+        join_refresh()
+
+        assert adapter.call_count == 2
+        assert os.environ["API_KEY"] == "rotated_api_key"
+
+
+def test_seed_joins_prefetch(monkeypatch, mock_secrets_response):
+    """Test that seed waits for a fetch started by prefetch rather than starting another."""
+    monkeypatch.setenv("SECRET_ARN", "test_secret_arn")
+
+    with requests_mock.Mocker() as m:
+        adapter = m.get("http://localhost:2773/secretsmanager/get?secretId=test_secret_arn&versionStage=AWSCURRENT", text=mock_secrets_response)
+
+        environment.prefetch()
+        environment.seed()
+
+        assert adapter.call_count == 1
+        assert os.environ["API_KEY"] == "test_api_key"
+
+
+def test_seed_does_not_overwrite_environment(monkeypatch, mock_secrets_response):
+    """Test that variables set outside the secret are left alone, including on refresh."""
+    monkeypatch.setenv("SECRET_ARN", "test_secret_arn")
+    monkeypatch.setenv("SECRETS_TTL_SECONDS", "0")
+    monkeypatch.setenv("COMMGT_BASE_URL", "http://example.com")
+
+    with requests_mock.Mocker() as m:
+        m.get("http://localhost:2773/secretsmanager/get?secretId=test_secret_arn&versionStage=AWSCURRENT", text=mock_secrets_response)
+
+        environment.seed()
+        environment.seed()
+        join_refresh()
+
+    assert os.environ["COMMGT_BASE_URL"] == "http://example.com"
+
+
+def test_seed_failure_raises(monkeypatch):
+    """Test that seed raises when the first fetch fails."""
+    monkeypatch.setenv("SECRET_ARN", "test_secret_arn")
+    monkeypatch.setattr(environment.time, "sleep", Mock())
+
+    with requests_mock.Mocker() as m:
+        m.get(
+            "http://localhost:2773/secretsmanager/get?secretId=test_secret_arn&versionStage=AWSCURRENT",
+            exc=requests.ConnectionError,
+        )
+
+        with pytest.raises(environment.FetchSecretsError):
+            environment.seed()
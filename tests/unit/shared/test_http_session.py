@@ -0,0 +1,47 @@
+import http_session
+import pytest
+import requests
+import requests_mock
+
+
+@pytest.fixture(autouse=True)
+def reset_session():
+    yield
+    http_session.close_session()
+
+
+def test_session_is_reused():
+    first = http_session.session()
+
+    assert isinstance(first, requests.Session)
+    assert http_session.session() is first
+
+
+def test_close_session():
+    first = http_session.session()
+
+    http_session.close_session()
+
+    assert http_session.session() is not first
+
+
+def test_build_session(monkeypatch):
+    monkeypatch.setenv("HTTP_POOL_CONNECTIONS", "2")
+    monkeypatch.setenv("HTTP_POOL_MAXSIZE", "20")
+
+    subject = http_session.build_session()
+    adapter = subject.get_adapter("https://example.com")
+
+    assert subject.headers["Connection"] == "keep-alive"
+    assert adapter is subject.get_adapter("http://example.com")
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 20
+
+
+def test_session_requests_can_be_mocked():
+    with requests_mock.Mocker() as rm:
+        rm.get("http://example.com/statuses", status_code=201)
+
+        response = http_session.session().get("http://example.com/statuses", timeout=1)
+
+    assert response.status_code == 201
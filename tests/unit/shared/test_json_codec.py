@@ -0,0 +1,38 @@
+import json
+from unittest.mock import Mock
+import json_codec
+
+
+def test_dumps_is_compact_utf8():
+    assert json_codec.dumps({"data": {"id": "batch_id", "items": [1, 2], "name": "Zoë"}}) == (
+        '{"data":{"id":"batch_id","items":[1,2],"name":"Zoë"}}'.encode("utf-8")
+    )
+
+
+def test_dumps_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(json_codec, "orjson", None)
+
+    assert json_codec.dumps({"a": [1, None, "b"]}) == b'{"a":[1,null,"b"]}'
+    assert json_codec.backend() == "json"
+
+
+def test_dumps_uses_orjson_when_installed(monkeypatch):
+    orjson = Mock(dumps=Mock(return_value=b"{}"), loads=Mock(return_value={}))
+    monkeypatch.setattr(json_codec, "orjson", orjson)
+
+    assert json_codec.dumps({}) == b"{}"
+    assert json_codec.loads(b"{}") == {}
+    assert json_codec.backend() == "orjson"
+    orjson.dumps.assert_called_once_with({})
+    orjson.loads.assert_called_once_with(b"{}")
+
+
+def test_loads():
+    assert json_codec.loads(b'{"data":[{"message_reference":"ref"}]}') == {"data": [{"message_reference": "ref"}]}
+    assert json_codec.loads('{"status":"success"}') == {"status": "success"}
+
+
+def test_encode_string_matches_dumps():
+    for value in ["message_reference", 'quote " and \\ backslash', "Zoë", "", None, 1234567890]:
+        assert json_codec.encode_string(value) == json_codec.dumps(value).decode("utf-8")
+        assert json.loads(json_codec.encode_string(value)) == value
@@ -0,0 +1,28 @@
+from unittest.mock import Mock
+from lazy import Lazy
+
+
+def test_get_builds_each_value_once():
+    factory = Mock(side_effect=lambda *args: object())
+    values = Lazy(factory)
+
+    first = values.get()
+
+    assert values.get() is first
+    assert values.get("name") is values.get("name")
+    assert values.get("name") is not first
+    assert factory.call_count == 2
+
+
+def test_items_pop_and_clear():
+    values = Lazy(lambda name: f"value for {name}")
+    values.get("a")
+    values.get("b")
+
+    assert values.items() == [(("a",), "value for a"), (("b",), "value for b")]
+    assert values.pop("a") == "value for a"
+    assert values.pop("a") is None
+
+    values.clear()
+
+    assert values.items() == []
@@ -0,0 +1,117 @@
+import threading
+from unittest.mock import Mock
+import rate_limiter
+
+
+def response(status_code, headers=None):
+    return Mock(status_code=status_code, headers=headers or {})
+
+
+def test_acquire_allows_a_burst_then_paces_requests():
+    bucket = rate_limiter.TokenBucket(2.0)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 0.5
+
+    assert bucket.metrics["requests"] == 4
+    assert bucket.metrics["waits"] == 2
+    assert bucket.metrics["wait_seconds"] == 1.0
+    assert bucket.metrics["max_wait_seconds"] == 0.5
+
+
+def test_throttled_response_halves_rate_and_holds_until_retry_after():
+    bucket = rate_limiter.TokenBucket(4.0)
+
+    bucket.observe(response(429, {"Retry-After": "3"}))
+
+    assert bucket.rate == 2.0
+    assert bucket.metrics["throttled"] == 1
+    assert bucket.acquire() >= 3
+
+
+def test_successful_responses_recover_the_rate():
+    bucket = rate_limiter.TokenBucket(10.0)
+    bucket.observe(response(429))
+    bucket.observe(response(429))
+
+    assert bucket.rate == 2.5
+
+    for _ in range(100):
+        bucket.observe(response(201))
+
+    assert bucket.rate == 10.0
+
+
+def test_rate_never_drops_below_minimum():
+    bucket = rate_limiter.TokenBucket(10.0)
+
+    for _ in range(20):
+        bucket.observe(response(429))
+
+    assert bucket.rate == 10.0 * rate_limiter.MIN_RATE_FRACTION
+
+
+def test_exhausted_quota_headers_hold_until_reset():
+    bucket = rate_limiter.TokenBucket(10.0)
+
+    bucket.observe(response(201, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2"}))
+
+    assert bucket.acquire() >= 2
+
+
+def test_remaining_quota_headers_do_not_hold():
+    bucket = rate_limiter.TokenBucket(10.0)
+
+    bucket.observe(response(201, {"RateLimit-Remaining": "5", "RateLimit-Reset": "2"}))
+
+    assert bucket.acquire() == 0
+
+
+def test_reset_seconds_accepts_unix_timestamps(monkeypatch):
+    monkeypatch.setattr(rate_limiter.time, "time", Mock(return_value=1_700_000_000.0))
+
+    assert rate_limiter.reset_seconds(1_700_000_005.0) == 5.0
+    assert rate_limiter.reset_seconds(5.0) == 5.0
+    assert rate_limiter.reset_seconds(None) is None
+
+
+def test_limiters_are_shared_per_endpoint_with_separate_rates(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_MESSAGE_BATCH_PER_SECOND", "1")
+    monkeypatch.setenv("RATE_LIMIT_STATUSES_PER_SECOND", "50")
+
+    assert rate_limiter.limiter("message_batch") is rate_limiter.limiter("message_batch")
+    assert rate_limiter.limiter("message_batch").max_rate == 1.0
+    assert rate_limiter.limiter("statuses").max_rate == 50.0
+
+
+def test_limited_request_waits_then_observes_the_response(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_STATUSES_PER_SECOND", "1")
+    request = Mock(return_value=response(429, {"Retry-After": "2"}))
+    limited = rate_limiter.limited("statuses", request)
+
+    limited()
+    limited()
+
+    assert request.call_count == 2
+    metrics = rate_limiter.metrics()["statuses"]
+    assert metrics["requests"] == 2
+    assert metrics["throttled"] == 2
+    assert metrics["wait_seconds"] >= 2
+
+    rate_limiter.reset_metrics()
+    assert rate_limiter.metrics()["statuses"]["requests"] == 0
+
+
+def test_acquire_is_thread_safe():
+    bucket = rate_limiter.TokenBucket(1000.0)
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(100)]) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert bucket.metrics["requests"] == 800
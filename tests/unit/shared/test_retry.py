@@ -0,0 +1,104 @@
+import email.utils
+import time
+from unittest.mock import Mock
+import pytest
+import requests
+import retry
+
+
+def response(status_code, headers=None):
+    return Mock(status_code=status_code, headers=headers or {})
+
+
+def test_send_returns_successful_response_without_retrying():
+    request = Mock(return_value=response(201))
+
+    assert retry.send(request, "request").status_code == 201
+    request.assert_called_once()
+    retry.pause.assert_not_called()
+
+
+def test_send_retries_retryable_status_codes():
+    request = Mock(side_effect=[response(429), response(503), response(201)])
+
+    assert retry.send(request, "request").status_code == 201
+    assert request.call_count == 3
+    assert retry.pause.call_count == 2
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 403, 404, 422])
+def test_send_does_not_retry_other_status_codes(status_code):
+    request = Mock(return_value=response(status_code))
+
+    assert retry.send(request, "request").status_code == status_code
+    request.assert_called_once()
+
+
+def test_send_returns_last_response_after_max_attempts(monkeypatch):
+    monkeypatch.setenv("RETRY_MAX_ATTEMPTS", "3")
+    request = Mock(return_value=response(500))
+
+    assert retry.send(request, "request").status_code == 500
+    assert request.call_count == 3
+
+
+def test_send_retries_connection_errors_and_timeouts():
+    request = Mock(side_effect=[requests.ConnectionError("reset"), requests.Timeout("slow"), response(201)])
+
+    assert retry.send(request, "request").status_code == 201
+    assert request.call_count == 3
+
+
+def test_send_raises_last_error_after_max_attempts(monkeypatch):
+    monkeypatch.setenv("RETRY_MAX_ATTEMPTS", "2")
+    request = Mock(side_effect=requests.ConnectionError("reset"))
+
+    with pytest.raises(requests.ConnectionError):
+        retry.send(request, "request")
+
+    assert request.call_count == 2
+
+
+def test_send_honours_retry_after_seconds():
+    request = Mock(side_effect=[response(429, {"Retry-After": "3"}), response(201)])
+
+    retry.send(request, "request")
+
+    retry.pause.assert_called_once_with(3.0)
+
+
+def test_send_gives_up_when_retry_after_is_too_long():
+    request = Mock(return_value=response(503, {"Retry-After": str(retry.MAX_RETRY_AFTER_SECONDS + 1)}))
+
+    assert retry.send(request, "request").status_code == 503
+    request.assert_called_once()
+
+
+def test_retry_after_http_date():
+    retry_at = email.utils.formatdate(time.time() + 5, usegmt=True)
+
+    assert 3 < retry.retry_after_seconds(response(503, {"Retry-After": retry_at})) <= 5
+    assert retry.retry_after_seconds(response(503, {"Retry-After": "not a date"})) is None
+    assert retry.retry_after_seconds(response(503)) is None
+
+
+def test_backoff_is_jittered_and_capped():
+    for attempt in range(1, 10):
+        delay = retry.backoff_seconds(attempt)
+        assert 0 <= delay <= min(retry.MAX_DELAY_SECONDS, retry.BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+
+
+def test_retry_budget_is_shared_across_requests(monkeypatch):
+    monkeypatch.setenv("RETRY_BUDGET", "2")
+    retry.reset_budget()
+    first = Mock(side_effect=[response(500), response(500), response(500)])
+    second = Mock(return_value=response(500))
+
+    assert retry.send(first, "first").status_code == 500
+    assert retry.send(second, "second").status_code == 500
+
+    assert first.call_count == 3
+    second.assert_called_once()
+
+    retry.reset_budget()
+    assert retry.take_retry() is True
@@ -0,0 +1,62 @@
+import pytest
+from unittest.mock import Mock
+from time_budget import TimeBudget, SMOOTHING
+
+
+def context(remaining_millis):
+    return Mock(get_remaining_time_in_millis=Mock(return_value=remaining_millis))
+
+
+def test_unlimited_without_context():
+    budget = TimeBudget(None, 10)
+
+    assert budget.remaining_seconds() is None
+    assert budget.can_start()
+    assert not budget.exhausted
+
+
+def test_can_start_when_estimate_fits():
+    budget = TimeBudget(context(30000), 10)
+
+    assert budget.can_start()
+    assert not budget.exhausted
+
+
+def test_cannot_start_when_estimate_overruns_margin():
+    budget = TimeBudget(context(19999), 10)
+
+    assert not budget.can_start()
+    assert budget.exhausted
+
+
+def test_exhausted_is_sticky():
+    lambda_context = context(15000)
+    budget = TimeBudget(lambda_context, 10)
+    assert not budget.can_start()
+
+    lambda_context.get_remaining_time_in_millis.return_value = 300000
+
+    assert not budget.can_start()
+
+
+def test_margin_is_configurable(monkeypatch):
+    monkeypatch.setenv("DEADLINE_MARGIN_MILLIS", "1000")
+    budget = TimeBudget(context(12000), 10)
+
+    assert budget.can_start()
+
+
+def test_record_rises_to_slower_observations():
+    budget = TimeBudget(None, 10)
+
+    budget.record(25)
+
+    assert budget.estimate_seconds == 25
+
+
+def test_record_decays_towards_faster_observations():
+    budget = TimeBudget(None, 10)
+
+    budget.record(5)
+
+    assert budget.estimate_seconds == pytest.approx(SMOOTHING * 5 + (1 - SMOOTHING) * 10)